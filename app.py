@@ -1,21 +1,55 @@
 import streamlit as st
 import polars as pl
+import altair as alt
 import os
-import asyncio
-import json
-import re
 import requests
+from functools import partial
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_ollama import ChatOllama
+from src.agent_runner import AgentRunner
+from src.browser_pool import BrowserPool
+from src.browser_profile import PROFILES, apply_profile, browser_config, get_profile
+from src.extractor import PORTAL_LOGIN_URL
 from src.models import CourseOfferings
-from browser_use import Agent, BrowserConfig, Controller
-from browser_use.browser.browser import Browser
-from browser_use.browser.context import BrowserContextConfig
+from src.offerings_cache import OfferingsCache
+from src.extraction_coordinator import ExtractionCoordinator
+from src.interval_index import ALL_DAYS, IntervalIndex
+from src.jobs import Job, JobManager
+from src.sections import DAY_LETTERS, SectionTable, letters_mask
+from src.session_cache import (
+    PORTAL_HOME_URL,
+    SessionCache,
+    restore_session,
+    save_agent_context,
+)
+from src.ranking import SchedulePreferences, ScheduleRanker
+from src.exports import (
+    EXPORT_FORMATS,
+    ExportService,
+    export_key,
+    failed,
+    frame_fingerprint,
+)
+from src.facets import FacetIndex, bitmap_rows, rows_to_bitmap
+from src.result_recovery import recover_offerings
+from src.run_trace import PHASES, RunTracer, list_traces, load_trace, summarize_steps
+from src.solver import ScheduleSolver
+from src.trajectory_cache import TrajectoryCache
+from src.storage import (
+    COURSE_COLUMNS,
+    DEFAULT_RESULTS_PATH,
+    load_results,
+    offerings_frame,
+    section_table,
+    with_typed_columns,
+    write_results,
+)
+from browser_use import Agent, Controller
 from pydantic import SecretStr
 import traceback
 import logging
-import io
+import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -69,18 +103,203 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "courses_df" not in st.session_state:
     st.session_state.courses_df = None
+    # Identifies the loaded data set; keys every cached index built from it
+    st.session_state.data_version = None
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 if "model_choice" not in st.session_state:
     st.session_state.model_choice = "Gemini"
+if "browser_profile" not in st.session_state:
+    st.session_state.browser_profile = "default"
+if "job_ids" not in st.session_state:
+    # Jobs this session submitted, and those whose results it has loaded
+    st.session_state.job_ids = []
+    st.session_state.applied_jobs = set()
+
+
+# Shared encrypted cache of logged-in portal sessions
+@st.cache_resource
+def get_session_cache():
+    return SessionCache()
+
+
+@st.cache_resource
+def get_offerings_cache():
+    return OfferingsCache()
+
+
+@st.cache_resource
+def get_trajectory_cache():
+    return TrajectoryCache()
+
+
+def set_course_data(df: pl.DataFrame):
+    st.session_state.courses_df = df
+    st.session_state.data_version = frame_fingerprint(df)
+
+
+# Indexes over the loaded data, built once per data version and shared by
+# every rerun and session; the frame itself is not hashed
+@st.cache_resource(max_entries=4)
+def get_facet_index(version: str, _df: pl.DataFrame) -> FacetIndex:
+    return FacetIndex.from_frame(_df)
+
+
+@st.cache_resource(max_entries=4)
+def get_section_table(version: str, _df: pl.DataFrame) -> SectionTable:
+    return section_table(_df)
+
+
+@st.cache_resource(max_entries=4)
+def get_interval_index(version: str, _df: pl.DataFrame) -> IntervalIndex:
+    return IntervalIndex(get_section_table(version, _df))
+
+
+@st.cache_resource(max_entries=4)
+def get_solver(version: str, _df: pl.DataFrame) -> ScheduleSolver:
+    return ScheduleSolver(get_section_table(version, _df))
+
+
+# Warm browsers shared by every run and session, closed at exit; one pool
+# per browser profile
+@st.cache_resource
+def get_browser_pool(profile: str = "default"):
+    pool = BrowserPool(browser_config(get_profile(profile)))
+    pool.warm()
+    return pool
+
+
+@st.cache_resource
+def get_extraction_coordinator():
+    return ExtractionCoordinator()
+
+
+# Downloads are rendered off the script thread and shared across sessions
+@st.cache_resource
+def get_export_service():
+    return ExportService()
+
+
+def render_downloads(key: str, df: pl.DataFrame):
+    """Prepare-on-request download buttons for one filtered view"""
+    service = get_export_service()
+    labels = {"csv": "CSV", "xlsx": "Excel"}
+    for column, fmt in zip(st.columns(len(labels)), labels):
+        mime, _ = EXPORT_FORMATS[fmt]
+        future = service.get(key, fmt)
+        with column:
+            if future is not None and future.done() and not failed(future):
+                st.download_button(
+                    label=f"Download as {labels[fmt]}",
+                    data=future.result(),
+                    file_name=f"filtered_courses.{fmt}",
+                    mime=mime,
+                    key=f"download_{fmt}",
+                )
+            elif future is not None and not future.done():
+                st.caption(f"Preparing {labels[fmt]} download...")
+            else:
+                if future is not None:
+                    st.error(f"{labels[fmt]} export failed: {future.exception()}")
+                if st.button(f"Prepare {labels[fmt]} download", key=f"prepare_{fmt}"):
+                    service.submit(key, fmt, df)
+                    st.rerun()
+
+
+def show_downloads(key: str, df: pl.DataFrame):
+    service = get_export_service()
+    pending = any(
+        future is not None and not future.done()
+        for future in (service.get(key, fmt) for fmt in EXPORT_FORMATS)
+    )
+    # Poll only while an export is still being rendered
+    st.fragment(render_downloads, run_every=1 if pending else None)(key, df)
+
+
+# Extractions run off the script thread so the app stays responsive; jobs
+# outlive a page reload and are found again by the portal username
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+
+def submit_job(name: str, function) -> Job:
+    job = get_job_manager().submit(name, function, owner=st.session_state.username)
+    st.session_state.job_ids.append(job.id)
+    return job
+
+
+def apply_job_result(job: Job):
+    """Load a finished job's course data into this session, once"""
+    st.session_state.applied_jobs.add(job.id)
+    df = (job.result or {}).get("df")
+    if df is not None:
+        set_course_data(df)
+        # Written here rather than by the job, so a fetch of another scope
+        # running for someone else cannot overwrite the file under this session
+        write_results(df, os.path.join(os.getcwd(), DEFAULT_RESULTS_PATH))
+
+
+def render_jobs():
+    manager = get_job_manager()
+    jobs = manager.jobs(owner=st.session_state.username)
+    if not jobs:
+        st.caption("No background jobs yet.")
+        return
+    for job in jobs:
+        applied = job.id in st.session_state.applied_jobs
+        if job.done and not applied and job.id in st.session_state.job_ids:
+            apply_job_result(job)
+            # Let every tab see the new data
+            st.rerun()
+        with st.expander(f"{job.name} · {job.status}", expanded=not job.done):
+            st.caption(
+                f"Step {job.step} · {job.rows} rows · {job.elapsed:.0f}s"
+                + (f" · {job.message}" if job.message else "")
+            )
+            if job.error:
+                st.error(job.error)
+            if not job.done:
+                if st.button("Cancel", key=f"cancel_{job.id}"):
+                    manager.cancel(job.id)
+                    st.rerun()
+                # The table fills in page by page while the fetch runs
+                if job.partial is not None:
+                    st.dataframe(job.partial, use_container_width=True)
+            elif job.result:
+                if job.result.get("message"):
+                    st.write(job.result["message"])
+                if job.result.get("df") is not None and not applied:
+                    if st.button("Load results", key=f"load_{job.id}"):
+                        apply_job_result(job)
+                        st.rerun()
+                if job.result.get("history") is not None:
+                    show_instruction_steps(job.result["history"])
+
+
+def show_jobs():
+    active = any(not job.done for job in get_job_manager().jobs(owner=st.session_state.username))
+    # Poll only while a job is queued or running
+    st.fragment(render_jobs, run_every=1 if active else None)()
 
 
 # Function to load saved data if exists
 def load_saved_data():
     try:
+        # Prefer a fresh offerings snapshot over whatever the results file holds
+        cache = get_offerings_cache()
+        snapshot = cache.latest()
+        if snapshot and snapshot.pages and cache.is_fresh(snapshot):
+            set_course_data(offerings_frame(snapshot.offerings().courses))
+            return True
+        df = load_results()
+        if df is not None:
+            set_course_data(df)
+            return True
+        # Results saved as CSV by older versions
         if os.path.exists("results.csv"):
-            df = pl.read_csv("results.csv")
-            st.session_state.courses_df = df
+            df = pl.read_csv("results.csv", infer_schema=False)
+            set_course_data(with_typed_columns(df))
             return True
         return False
     except Exception as e:
@@ -97,6 +316,49 @@ def is_ollama_running():
         return False
 
 
+def build_llm(model_choice, api_key):
+    if model_choice == "Ollama":
+        return ChatOllama(model="llama3", num_ctx=32000)
+    # Default to Gemini
+    return ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", api_key=SecretStr(api_key))
+
+
+# Scrape the offerings page by page, reporting each batch as it arrives
+async def stream_offerings(job, username, password, api_key, model_choice, profile="default"):
+    runner = AgentRunner(
+        llm=build_llm(model_choice, api_key),
+        username=username,
+        password=password,
+        filters={},
+        session_cache=get_session_cache(),
+        offerings_cache=get_offerings_cache(),
+        browser_pool=get_browser_pool(profile),
+        trajectory_cache=get_trajectory_cache(),
+        profile=profile,
+    )
+
+    async def fetch(report):
+        df = None
+        async for batch in runner.stream():
+            frame = offerings_frame(batch)
+            df = frame if df is None else pl.concat([df, frame])
+            report(df)
+        return df
+
+    def on_rows(df):
+        job.progress(
+            step=job.step + 1, rows=len(df), message=f"{len(df)} courses so far", partial=df
+        )
+
+    # Users asking for the same term and division share one scrape
+    df = await get_extraction_coordinator().extract(
+        runner.term, runner.division, fetch, on_rows=on_rows
+    )
+    if df is None:
+        return {"df": None, "message": "No course data extracted."}
+    return {"df": df, "message": f"✅ Loaded {len(df)} courses."}
+
+
 # Function to run direct browser-use instructions
 async def run_browser_instruction(
     instruction,
@@ -105,238 +367,116 @@ async def run_browser_instruction(
     api_key,
     use_structured_output=False,
     model_choice="Gemini",
+    job=None,
+    profile="default",
 ):
     try:
-        # Initialize the browser with default configuration
-        browser = Browser(
-            config=BrowserConfig(
-                new_context_config=BrowserContextConfig(
-                    viewport_expansion=0,
-                )
-            )
-        )
-
         # Initialize LLM based on model choice
-        if model_choice == "Ollama":
-            if not is_ollama_running():
-                return (
-                    "Error: Ollama is not running. Please start Ollama and try again."
-                )
-
-            llm = ChatOllama(model="llama3", num_ctx=32000)
-        else:  # Default to Gemini
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash-exp", api_key=SecretStr(api_key)
+        if model_choice == "Ollama" and not is_ollama_running():
+            return (
+                "Error: Ollama is not running. Please start Ollama and try again."
             )
-
-        if use_structured_output and "extract" in instruction.lower():
-            # Use structured output for extraction tasks
-            controller = Controller(output_model=CourseOfferings)
-
-            # Create agent with user instruction and controller
-            agent = Agent(
-                task=instruction,
-                llm=llm,
-                max_actions_per_step=10,
-                browser=browser,
-                sensitive_data={"user": username, "password": password},
-                controller=controller,
-            )
-        else:
-            # Regular agent without structured output
-            agent = Agent(
-                task=instruction,
-                llm=llm,
-                max_actions_per_step=10,
-                browser=browser,
-                sensitive_data={"user": username, "password": password},
+        llm = build_llm(model_choice, api_key)
+        session_cache = get_session_cache()
+
+        async def agent_job(browser, browser_context):
+            # Start from the cached portal session when there is one
+            await restore_session(browser_context, username, session_cache)
+            await apply_profile(
+                browser_context, get_profile(profile), (PORTAL_LOGIN_URL, PORTAL_HOME_URL)
             )
+            tracer = RunTracer("instruction")
+            traced_llm = tracer.instrument(llm)
+
+            async def on_step_start(agent):
+                await tracer.on_step_start(agent)
+                if job is not None:
+                    job.progress(step=tracer.step, message=f"Agent step {tracer.step}")
+
+            if use_structured_output and "extract" in instruction.lower():
+                # Use structured output for extraction tasks
+                controller = Controller(output_model=CourseOfferings)
+
+                # Create agent with user instruction and controller
+                agent = Agent(
+                    task=instruction,
+                    llm=traced_llm,
+                    max_actions_per_step=10,
+                    browser=browser,
+                    browser_context=browser_context,
+                    sensitive_data={"user": username, "password": password},
+                    use_vision=get_profile(profile).use_vision,
+                    controller=controller,
+                )
+            else:
+                # Regular agent without structured output
+                agent = Agent(
+                    task=instruction,
+                    llm=traced_llm,
+                    max_actions_per_step=10,
+                    browser=browser,
+                    browser_context=browser_context,
+                    sensitive_data={"user": username, "password": password},
+                    use_vision=get_profile(profile).use_vision,
+                )
+
+            # Run the agent, then keep its cookies so the next run starts logged in
+            try:
+                result = await agent.run(
+                    max_steps=100,
+                    on_step_start=on_step_start,
+                    on_step_end=tracer.on_step_end,
+                )
+            finally:
+                tracer.close()
+            await save_agent_context(browser_context, username, session_cache)
+            return result
 
-        # Run the agent
-        result = await agent.run(max_steps=100)
-        return result
+        # Runs in a fresh context on a warm pooled browser
+        return await get_browser_pool(profile).run_async(agent_job)
     except Exception as e:
         logger.error(f"Error running browser instruction: {str(e)}")
         logger.error(traceback.format_exc())
         return f"Error running browser instruction: {str(e)}"
 
 
-# Function to extract and save data from browser-use results
-def extract_and_save_data_from_result(result):
-    try:
-        # Process result using the same approach as AgentRunner
-        # Initialize an empty list to store all courses
-        all_courses = []
-        courses_obj = None
-
-        # Case 1: Check if we have a final_result method with structured output
-        if hasattr(result, "final_result") and callable(
-            getattr(result, "final_result")
-        ):
-            final_result = result.final_result()
-            if final_result:
-                try:
-                    # Try to directly parse the final result
-                    courses_obj = CourseOfferings.model_validate_json(final_result)
-                    if courses_obj and courses_obj.courses:
-                        # Convert to polars DataFrame
-                        df = pl.DataFrame([course.model_dump() for course in courses_obj.courses])
-
-                        # Save to CSV and Excel
-                        csv_path = os.path.join(os.getcwd(), "results.csv")
-                        excel_path = os.path.join(os.getcwd(), "course_offerings.xlsx")
-
-                        df.write_csv(csv_path)
-                        
-                        # Convert to pandas first for Excel export
-                        pd_df = df.to_pandas()
-                        pd_df.to_excel(excel_path, index=False)
-
-                        return (
-                            df,
-                            f"✅ Successfully saved {len(df)} records to CSV and Excel files!",
-                        )
-                except Exception as e:
-                    logger.warning(f"Failed to parse final result: {e}")
-                    # Continue with other extraction methods
-
-        # Case 2: Process all steps in the agent history
-        if hasattr(result, "__iter__"):
-            for step in result:
-                # Check for done action with successful result
-                if (
-                    hasattr(step, "action")
-                    and isinstance(step.action, dict)
-                    and "done" in step.action
-                ):
-                    done_data = step.action.get("done", {})
-                    if (
-                        isinstance(done_data, dict)
-                        and done_data.get("success")
-                        and "text" in done_data
-                    ):
-                        # Try to extract JSON from the text
-                        text = done_data["text"]
-                        try:
-                            # Look for JSON pattern in the text
-                            json_match = re.search(
-                                r'(\{.*"courses"\s*:\s*\[.*\].*\})', text, re.DOTALL
-                            )
-                            if json_match:
-                                json_str = json_match.group(1)
-                                courses_data = json.loads(json_str)
-                                courses_obj = CourseOfferings.model_validate(
-                                    courses_data
-                                )
-                                break
-                            else:
-                                # Try to find a JSON array directly
-                                json_array_match = re.search(
-                                    r"\[(.*)\]", text, re.DOTALL
-                                )
-                                if json_array_match:
-                                    try:
-                                        array_data = json.loads(
-                                            f"[{json_array_match.group(1)}]"
-                                        )
-                                        if isinstance(array_data, list):
-                                            all_courses.extend(array_data)
-                                    except json.JSONDecodeError:
-                                        pass
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to extract JSON from done action: {e}"
-                            )
+def show_instruction_steps(result):
+    st.markdown("**Execution Steps**")
+    if hasattr(result, "__iter__") and not isinstance(result, str):
+        for step_num, step in enumerate(result):
+            st.markdown(f"*Step {step_num + 1}*")
+            if hasattr(step, "action"):
+                st.write(f"**Action:** {step.action}")
+            if hasattr(step, "observation"):
+                st.write(f"**Observation:** {step.observation}")
+            if hasattr(step, "thought"):
+                st.write(f"**Thought:** {step.thought}")
+            if hasattr(step, "controller_response"):
+                st.write(f"**Response:** {step.controller_response}")
+    else:
+        st.write(str(result))
 
-                # Check for controller_response which contains extracted data
-                if hasattr(step, "controller_response") and step.controller_response:
-                    response = str(step.controller_response)
 
-                    # Look for JSON format in code blocks
-                    json_match = re.search(
-                        r"```json\s*([\s\S]*?)\s*```", response, re.DOTALL
-                    )
-                    if json_match:
-                        try:
-                            json_str = json_match.group(1)
-                            data = json.loads(json_str)
-
-                            # Case: Full CourseOfferings format
-                            if isinstance(data, dict) and "courses" in data:
-                                courses_obj = CourseOfferings.model_validate(data)
-                                break
-
-                            # Case: Just an array of courses
-                            if isinstance(data, list):
-                                all_courses.extend(data)
-
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"Could not decode JSON: {e}")
-
-                    # Try alternative pattern matching for JSON arrays
-                    if not courses_obj and not all_courses:
-                        json_array_match = re.search(
-                            r"\[\s*\{.*?\}\s*(?:,\s*\{.*?\}\s*)*\]", response, re.DOTALL
-                        )
-                        if json_array_match:
-                            try:
-                                array_text = json_array_match.group(0)
-                                courses_data = json.loads(array_text)
-                                if isinstance(courses_data, list):
-                                    all_courses.extend(courses_data)
-                            except json.JSONDecodeError:
-                                pass
-
-        # Process the collected data
-        if courses_obj and courses_obj.courses:
-            df = pl.DataFrame([course.model_dump() for course in courses_obj.courses])
-        elif all_courses:
-            # Try to standardize field names for consistency
-            standardized_courses = []
-            for course in all_courses:
-                # Map common field variations
-                standardized = {}
-                for key, value in course.items():
-                    lower_key = key.lower()
-                    if "code" in lower_key:
-                        standardized["course_code"] = value
-                    elif "name" in lower_key:
-                        standardized["course_name"] = value
-                    elif "credit" in lower_key:
-                        standardized["credits"] = value
-                    elif "instructor" in lower_key or "professor" in lower_key:
-                        standardized["instructor"] = value
-                    elif "room" in lower_key:
-                        standardized["room"] = value
-                    elif "day" in lower_key:
-                        standardized["days"] = value
-                    elif "start" in lower_key and "time" in lower_key:
-                        standardized["start_time"] = value
-                    elif "end" in lower_key and "time" in lower_key:
-                        standardized["end_time"] = value
-                    elif "max" in lower_key and "enr" in lower_key:
-                        standardized["max_enrollment"] = value
-                    elif "total" in lower_key and "enr" in lower_key:
-                        standardized["total_enrollment"] = value
-                    else:
-                        standardized[key] = value
-                standardized_courses.append(standardized)
-
-            df = pl.DataFrame(standardized_courses)
-        else:
-            return None, "Could not extract structured data from the automation results"
+async def instruction_job(job, save_option, **kwargs):
+    result = await run_browser_instruction(job=job, **kwargs)
+    df, message = None, None
+    if save_option:
+        df, message = extract_and_save_data_from_result(result)
+        if df is not None:
+            job.progress(rows=len(df))
+    return {"df": df, "message": message, "history": result}
 
-        # Save the data
-        csv_path = os.path.join(os.getcwd(), "results.csv")
-        excel_path = os.path.join(os.getcwd(), "course_offerings.xlsx")
 
-        df.write_csv(csv_path)
-        
-        # Convert to pandas for Excel export
-        pd_df = df.to_pandas()
-        pd_df.to_excel(excel_path, index=False)
+# Function to extract and save data from browser-use results
+def extract_and_save_data_from_result(result):
+    try:
+        # Same single-pass recovery the AgentRunner uses
+        courses_obj = recover_offerings(result)
+        if not courses_obj or not courses_obj.courses:
+            return None, "Could not extract structured data from the automation results"
 
-        return df, f"✅ Successfully saved {len(df)} records to CSV and Excel files!"
+        df = offerings_frame(courses_obj.courses)
+        return df, f"✅ Successfully saved {len(df)} records!"
 
     except Exception as e:
         logger.error(f"Error processing results: {str(e)}")
@@ -411,6 +551,13 @@ with st.sidebar:
     else:
         st.success(f"Logged in as: {st.session_state.username}")
         st.info(f"Using model: {st.session_state.model_choice}")
+        st.selectbox(
+            "Browser profile",
+            options=list(PROFILES),
+            key="browser_profile",
+            help="Lean runs headless, skips images, fonts, stylesheets and third-party "
+            "requests, and sends the agent the page text without screenshots",
+        )
         if st.button("Logout"):
             st.session_state.authenticated = False
             st.session_state.username = ""
@@ -425,13 +572,18 @@ with st.sidebar:
             else:
                 st.warning("No saved course data found.")
 
+        st.subheader("Background Jobs")
+        show_jobs()
+
 # Main content
 if not st.session_state.authenticated:
     st.title("CUD Schedule Finder")
     st.info("Please log in using the sidebar to access the application.")
 else:
     # Create tabs for different functionalities
-    tab1, tab2 = st.tabs(["Browser Instructions", "Course Search"])
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["Browser Instructions", "Course Search", "Schedule Builder", "Run Profile"]
+    )
 
     # Tab 1: Browser Instructions
     with tab1:
@@ -454,7 +606,7 @@ else:
 
         col1, col2 = st.columns([1, 2])
         with col1:
-            save_option = st.checkbox("Save extracted data to CSV/Excel", value=True)
+            save_option = st.checkbox("Save extracted course data", value=True)
         with col2:
             structured_output = st.checkbox(
                 "Use structured output format (recommended for data extraction)",
@@ -468,132 +620,110 @@ else:
             )
 
         if run_button and instruction:
-            status_container = st.empty()
-            status_container.info("Starting browser automation...")
+            submit_job(
+                f"Instruction: {instruction[:40]}",
+                partial(
+                    instruction_job,
+                    save_option=save_option,
+                    instruction=instruction,
+                    username=st.session_state.username,
+                    password=st.session_state.password,
+                    api_key=st.session_state.api_key,
+                    use_structured_output=structured_output,
+                    model_choice=st.session_state.model_choice,
+                    profile=st.session_state.browser_profile,
+                ),
+            )
+            st.rerun()
 
-            try:
-                # Use asyncio.run 
-                status_container.info(
-                    "Browser automation running... This may take a minute."
-                )
-                result = asyncio.run(
-                    run_browser_instruction(
-                        instruction=instruction,
+    # Tab 2: Course Search
+    with tab2:
+        st.header("Course Search & Filter")
+
+        if st.button("Fetch Course Offerings from Portal"):
+            if st.session_state.model_choice == "Ollama" and not is_ollama_running():
+                st.error("Ollama not running. Please start Ollama and try again.")
+            else:
+                # The job runs on another thread, so it gets values, not session state
+                submit_job(
+                    "Fetch course offerings",
+                    partial(
+                        stream_offerings,
                         username=st.session_state.username,
                         password=st.session_state.password,
                         api_key=st.session_state.api_key,
-                        use_structured_output=structured_output,
                         model_choice=st.session_state.model_choice,
-                    )
+                        profile=st.session_state.browser_profile,
+                    ),
                 )
-
-                # Display result
-                status_container.success("Browser automation completed!")
-
-                # Process and save results if requested
-                if save_option:
-                    df, message = extract_and_save_data_from_result(result)
-                    if df is not None:
-                        st.session_state.courses_df = df
-                        st.success(message)
-
-                        # Show a preview of the extracted data
-                        st.subheader("Extracted Data Preview")
-                        st.dataframe(df.head(10), use_container_width=True)
-                    else:
-                        st.warning(message)
-
-                # Format and display results
-                st.subheader("Execution Steps")
-                if hasattr(result, "__iter__"):
-                    for step_num, step in enumerate(result):
-                        with st.expander(f"Step {step_num + 1}"):
-                            if hasattr(step, "action"):
-                                st.write(f"**Action:** {step.action}")
-                            if hasattr(step, "observation"):
-                                st.write(f"**Observation:** {step.observation}")
-                            if hasattr(step, "thought"):
-                                st.write(f"**Thought:** {step.thought}")
-                            if hasattr(step, "controller_response"):
-                                st.write(f"**Response:** {step.controller_response}")
-                else:
-                    st.write(str(result))
-
-            except Exception as e:
-                status_container.error(f"Error running browser automation: {str(e)}")
-                st.error(traceback.format_exc())
-
-    # Tab 2: Course Search
-    with tab2:
-        st.header("Course Search & Filter")
+                st.rerun()
 
         if st.session_state.courses_df is not None:
             df = st.session_state.courses_df
+            version = st.session_state.data_version
+            facets = get_facet_index(version, df)
 
             # Create filter columns
             col1, col2, col3 = st.columns(3)
 
             with col1:
                 # Filter by course code
-                course_codes = ["All"] + sorted(df["course_code"].unique().to_list())
+                course_codes = ["All"] + facets.options("course_code")
                 selected_code = st.selectbox("Filter by Course Code", course_codes)
 
             with col2:
                 # Filter by instructor
-                instructors = ["All"] + sorted(df["instructor"].unique().to_list())
+                instructors = ["All"] + facets.options("instructor")
                 selected_instructor = st.selectbox("Filter by Instructor", instructors)
 
             with col3:
                 # Filter by days
-                days_options = ["All"] + sorted(df["days"].unique().to_list())
+                days_options = ["All"] + facets.options("days")
                 selected_days = st.selectbox("Filter by Days", days_options)
 
-            # Apply filters
-            filtered_df = df.clone()
-
-            if selected_code != "All":
-                filtered_df = filtered_df.filter(pl.col("course_code") == selected_code)
-
-            if selected_instructor != "All":
-                filtered_df = filtered_df.filter(pl.col("instructor") == selected_instructor)
-
-            if selected_days != "All":
-                filtered_df = filtered_df.filter(pl.col("days") == selected_days)
-
-            # Display filtered data
-            st.subheader(f"Results ({len(filtered_df)} courses)")
-            st.dataframe(filtered_df, use_container_width=True)
-
-            # Download options
+            # Time window and meeting days, answered by the interval index
             col1, col2 = st.columns(2)
             with col1:
-
-                # done due to csv parsing errors
-                csv_buffer = io.StringIO()
-                filtered_df.write_csv(csv_buffer)
-                csv_data = csv_buffer.getvalue().encode("utf-8")
-
-                st.download_button(
-                    label="Download as CSV",
-                    data=csv_data,
-                    file_name="filtered_courses.csv",
-                    mime="text/csv",
+                earliest, latest = datetime.time(7, 0), datetime.time(22, 0)
+                window = st.slider(
+                    "Meets between",
+                    min_value=earliest,
+                    max_value=latest,
+                    value=(earliest, latest),
+                    step=datetime.timedelta(minutes=15),
+                    format="HH:mm",
                 )
             with col2:
-                # Convert to pandas for Excel export
-                excel_path = "filtered_courses.xlsx"
-                pd_df = filtered_df.to_pandas()
-                pd_df.to_excel(excel_path, index=False)
-                with open(excel_path, "rb") as f:
-                    st.download_button(
-                        label="Download as Excel",
-                        data=f,
-                        file_name=excel_path,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                free_days = st.multiselect("Only meets on", list(DAY_LETTERS))
+
+            # Apply filters as an intersection of row bitmaps
+            rows = None
+            if window != (earliest, latest) or free_days:
+                rows = rows_to_bitmap(
+                    get_interval_index(version, df).within(
+                        window[0].hour * 60 + window[0].minute,
+                        window[1].hour * 60 + window[1].minute,
+                        letters_mask(free_days) or ALL_DAYS,
                     )
-                # Clean up the temporary file
-                if os.path.exists(excel_path):
-                    os.remove(excel_path)
+                )
+            selections = {
+                "course_code": selected_code,
+                "instructor": selected_instructor,
+                "days": selected_days,
+            }
+            rows = facets.select(
+                {facet: None if value == "All" else value for facet, value in selections.items()},
+                rows,
+            )
+            filtered_df = df if rows == facets.all else df[bitmap_rows(rows)]
+
+            # Display filtered data
+            st.subheader(f"Results ({len(filtered_df)} courses)")
+            st.dataframe(filtered_df.select(COURSE_COLUMNS), use_container_width=True)
+
+            # Download options, rendered only when asked for
+            filters = dict(selections, window=window, free_days=free_days)
+            show_downloads(export_key(version, filters), filtered_df)
         else:
             st.info(
                 "No course data available. Please extract course data first by using the Browser Instructions tab "
@@ -607,5 +737,118 @@ else:
                 else:
                     st.warning("No saved course data found.")
 
+    # Tab 3: Schedule Builder
+    with tab3:
+        st.header("Build a Clash-Free Schedule")
+
+        if st.session_state.courses_df is not None:
+            version = st.session_state.data_version
+            sections = get_section_table(version, st.session_state.courses_df)
+            solver = get_solver(version, st.session_state.courses_df)
+
+            wanted = st.multiselect("Courses to take", solver.course_codes)
+
+            with st.expander("Ranking preferences"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    day_weight = st.slider("Penalty per campus day", 0.0, 50.0, 10.0)
+                    gap_weight = st.slider("Penalty per idle hour", 0.0, 20.0, 3.0)
+                    early_start = st.time_input("Avoid classes starting before", value=datetime.time(9, 0))
+                with col2:
+                    early_weight = st.slider("Penalty per early class", 0.0, 20.0, 5.0)
+                    preferred_instructors = st.multiselect(
+                        "Preferred instructors", sorted(set(sections.instructor) - {""})
+                    )
+                    instructor_weight = st.slider(
+                        "Penalty per other instructor", 0.0, 20.0, 3.0
+                    )
+                top_k = st.number_input("Schedules to show", min_value=1, max_value=100, value=10)
+
+            if wanted:
+                ranker = ScheduleRanker(
+                    solver,
+                    SchedulePreferences(
+                        day_weight=day_weight,
+                        gap_weight=gap_weight / 60,
+                        early_start=early_start.hour * 60 + early_start.minute,
+                        early_weight=early_weight,
+                        preferred_instructors=preferred_instructors,
+                        instructor_weight=instructor_weight,
+                    ),
+                )
+                ranked = ranker.top(wanted, k=int(top_k), max_nodes=500_000)
+                if ranked:
+                    st.subheader(f"The {len(ranked)} best clash-free schedules")
+                    for number, result in enumerate(ranked, start=1):
+                        title = (
+                            f"#{number}: score {result.cost:.1f} - {result.days} days, "
+                            f"{result.gap_minutes} min of gaps, {result.early_meetings} early classes"
+                        )
+                        with st.expander(title, expanded=number == 1):
+                            st.dataframe(
+                                pl.DataFrame(result.schedule.to_records()),
+                                use_container_width=True,
+                            )
+                else:
+                    st.warning("Every combination of these courses has a time clash.")
+        else:
+            st.info("No course data available. Extract or load course data first.")
+
+    # Tab 4: Run Profile
+    with tab4:
+        st.header("Run Profile")
+
+        traces = list_traces()
+        if traces:
+            trace_path = st.selectbox(
+                "Agent run", traces, format_func=lambda path: os.path.basename(path)[:-6]
+            )
+            events = load_trace(trace_path)
+            steps = summarize_steps(events)
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Steps", sum(1 for step in steps if step["step"]))
+            col2.metric("Wall time", f"{max((e['end'] for e in events), default=0):.1f} s")
+            col3.metric("LLM time", f"{sum(step['llm'] for step in steps):.1f} s")
+            col4.metric(
+                "Tokens in / out",
+                f"{sum(step['input_tokens'] for step in steps):,} / "
+                f"{sum(step['output_tokens'] for step in steps):,}",
+            )
+
+            # Waterfall, one lane per step: the step's whole span is drawn as
+            # browser time first, with its LLM calls and page loads on top
+            spans = [
+                {
+                    "lane": f"Step {step['step']}",
+                    "phase": "browser",
+                    "start": step["start"],
+                    "end": step["start"] + step["total"],
+                }
+                for step in steps
+                if step["start"] is not None
+            ] + [
+                {**event, "lane": f"Step {event['step']}"}
+                for event in events
+                if event["phase"] != "step"
+            ]
+            chart = (
+                alt.Chart(alt.Data(values=spans))
+                .mark_bar()
+                .encode(
+                    x=alt.X("start:Q", title="Seconds since start"),
+                    x2="end:Q",
+                    y=alt.Y("lane:N", sort=None, title=None),
+                    color=alt.Color("phase:N", scale=alt.Scale(domain=list(PHASES))),
+                    tooltip=["phase:N", "start:Q", "end:Q"],
+                )
+            )
+            st.altair_chart(chart, use_container_width=True)
+
+            st.subheader("Per-step breakdown")
+            st.dataframe(pl.DataFrame(steps), use_container_width=True)
+        else:
+            st.info("No agent runs recorded yet. Traces appear here after a browser automation run.")
+
 # Footer
 st.markdown("---")
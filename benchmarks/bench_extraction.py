@@ -0,0 +1,179 @@
+"""End-to-end extraction benchmark against the local mock portal.
+
+Starts benchmarks.mock_portal and drives AgentRunner through it, reporting
+time to first row, total time, steps taken and rows per second for each
+extraction path. The scripted Playwright flow runs for both pager styles
+and, on the links pager, once per browser profile. It also times a single
+offerings page load under each profile, to show what the lean profile's
+resource blocking saves. The browser-use agent runs only with --agent,
+since it needs an LLM (GEMINI_API_KEY). Nothing touches the real portal.
+Run from the repository root:
+
+    python -m benchmarks.bench_extraction --rows 1000 --page-size 50
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from benchmarks.mock_portal import MockPortal
+from src.agent_runner import AgentRunner
+from src.browser_profile import PROFILES, get_profile, new_context
+from src.extractor import OfferingsExtractor
+from src.run_trace import load_trace
+
+
+@dataclass
+class Measurement:
+    label: str
+    rows: int
+    first_row: Optional[float]
+    total: float
+    steps: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total if self.total else 0.0
+
+
+async def measure(label: str, runner: AgentRunner) -> Measurement:
+    start = time.perf_counter()
+    first_row, rows, batches = None, 0, 0
+    async for batch in runner.stream(refresh=True):
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += len(batch)
+        batches += 1
+    total = time.perf_counter() - start
+
+    # Agent steps come from its trace; a scripted step is one results page
+    steps = batches
+    if runner.last_trace:
+        steps = sum(1 for event in load_trace(runner.last_trace) if event["phase"] == "step")
+    return Measurement(label, rows, first_row, total, steps)
+
+
+async def page_load_times(portal: MockPortal, profile: str, samples: int) -> List[float]:
+    """Seconds to load one results page in a fresh context, per sample"""
+    state, _ = await OfferingsExtractor(
+        username=portal.username,
+        password=portal.password,
+        login_url=portal.login_url,
+        home_url=portal.home_url,
+        profile=profile,
+    ).login_state()
+    url = f"{portal.base_url}/student/offerings.asp?division=SEAST"
+    times = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        try:
+            for _ in range(samples):
+                context = await new_context(
+                    browser, get_profile(profile), (portal.login_url,), storage_state=state
+                )
+                page = await context.new_page()
+                start = time.perf_counter()
+                await page.goto(url, wait_until="load")
+                times.append(time.perf_counter() - start)
+                await context.close()
+        finally:
+            await browser.close()
+    return times
+
+
+def make_runner(portal: MockPortal, mode: str, llm=None, **kwargs) -> AgentRunner:
+    return AgentRunner(
+        llm=llm,
+        username=portal.username,
+        password=portal.password,
+        filters={},
+        mode=mode,
+        division="SEAST",
+        login_url=portal.login_url,
+        home_url=portal.home_url,
+        **kwargs,
+    )
+
+
+def build_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from pydantic import SecretStr
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise SystemExit("--agent needs GEMINI_API_KEY")
+    return ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", api_key=SecretStr(api_key))
+
+
+async def run(args) -> tuple:
+    results, page_loads = [], {}
+    portal_options = dict(rows=args.rows, page_size=args.page_size, latency_ms=args.latency_ms)
+    for pager in ("links", "postback"):
+        with MockPortal(pager=pager, **portal_options) as portal:
+            profiles = args.profiles if pager == "links" else args.profiles[:1]
+            for profile in profiles:
+                for concurrency in args.concurrency:
+                    runner = make_runner(
+                        portal,
+                        "scripted",
+                        max_concurrency=concurrency,
+                        trace_dir=None,
+                        profile=profile,
+                    )
+                    label = f"scripted, {pager}" + (f", x{concurrency}" if pager == "links" else "")
+                    if len(args.profiles) > 1:
+                        label += f", {profile}"
+                    results.append(await measure(label, runner))
+                    if pager == "postback":
+                        # Postback pagers are read serially whatever the concurrency
+                        break
+            if pager == "links":
+                for profile in args.profiles:
+                    page_loads[profile] = await page_load_times(portal, profile, args.samples)
+
+    if args.agent:
+        with MockPortal(pager="links", **portal_options) as portal:
+            for profile in args.profiles:
+                runner = make_runner(portal, "agent", llm=build_llm(), profile=profile)
+                label = "agent" + (f", {profile}" if len(args.profiles) > 1 else "")
+                results.append(await measure(label, runner))
+    return results, page_loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=50, help="Server time per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--agent", action="store_true", help="Also run the LLM agent")
+    parser.add_argument(
+        "--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES)
+    )
+    parser.add_argument("--samples", type=int, default=10, help="Page loads timed per profile")
+    args = parser.parse_args()
+
+    results, page_loads = asyncio.run(run(args))
+    print(f"{'path':<30}{'rows':>7}{'first row':>12}{'total':>10}{'steps':>7}{'rows/s':>10}")
+    for result in results:
+        first_row = f"{result.first_row:.2f}s" if result.first_row is not None else "-"
+        print(
+            f"{result.label:<30}{result.rows:>7}{first_row:>12}{result.total:>9.2f}s"
+            f"{result.steps:>7}{result.rows_per_second:>10.0f}"
+        )
+
+    print(f"\n{'profile':<30}{'page load':>12}{'saved':>10}")
+    baseline = statistics.median(page_loads[args.profiles[0]]) if page_loads else 0.0
+    for profile, times in page_loads.items():
+        median = statistics.median(times)
+        print(f"{profile:<30}{median * 1000:>10.0f}ms{(baseline - median) * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
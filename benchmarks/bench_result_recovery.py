@@ -0,0 +1,120 @@
+"""Micro-benchmark: single-pass result recovery vs the old regex scan.
+
+Builds synthetic browser-use histories of a few megabytes and times
+src.result_recovery.recover_offerings against the regex-based parser
+AgentRunner used before. Run from the repository root:
+
+    python -m benchmarks.bench_result_recovery
+"""
+
+from dataclasses import dataclass
+import json
+import re
+import time
+
+from src.models import Course, CourseOfferings
+from src.result_recovery import recover_offerings
+
+
+@dataclass
+class Step:
+    action: dict
+    controller_response: str
+
+
+class History(list):
+    def final_result(self):
+        return None
+
+
+def legacy_recover(result):
+    """The regex scan AgentRunner._process_result used to run"""
+    all_courses = []
+    for step in result:
+        if isinstance(step.action, dict) and "done" in step.action:
+            done_data = step.action.get("done", {})
+            if isinstance(done_data, dict) and done_data.get("success") and "text" in done_data:
+                text = done_data["text"]
+                json_match = re.search(r'(\{.*"courses"\s*:\s*\[.*\].*\})', text, re.DOTALL)
+                if json_match:
+                    try:
+                        return CourseOfferings.model_validate(json.loads(json_match.group(1)))
+                    except Exception:
+                        pass
+        if step.controller_response:
+            response = str(step.controller_response)
+            json_match = re.search(r"```json\s*([\s\S]*?)\s*```", response, re.DOTALL)
+            if json_match:
+                try:
+                    data = json.loads(json_match.group(1))
+                    if isinstance(data, dict) and "courses" in data:
+                        return CourseOfferings.model_validate(data)
+                    if isinstance(data, list):
+                        all_courses.extend(data)
+                except json.JSONDecodeError:
+                    pass
+            json_array_match = re.search(
+                r"\[\s*\{.*?\}\s*(?:,\s*\{.*?\}\s*)*\]", response, re.DOTALL
+            )
+            if json_array_match:
+                try:
+                    courses_data = json.loads(json_array_match.group(0))
+                    if isinstance(courses_data, list):
+                        all_courses.extend(courses_data)
+                except json.JSONDecodeError:
+                    pass
+    return CourseOfferings(courses=all_courses) if all_courses else None
+
+
+def make_course(index: int) -> dict:
+    return Course(
+        course_code=f"BCS{index:04d}",
+        course_name=f"Course {index}",
+        credits="3",
+        instructor=f"Dr. Instructor {index % 40}",
+        room=f"R{index % 90}",
+        days="MW" if index % 2 else "TR",
+        start_time="10:00 AM",
+        end_time="11:15 AM",
+        max_enrollment="30",
+        total_enrollment=str(index % 30),
+    ).model_dump()
+
+
+def make_history(pages: int, per_page: int, with_done: bool) -> History:
+    history, collected = History(), []
+    filler = "The agent looked at the page and decided what to do next. " * 40
+    for page in range(pages):
+        rows = [make_course(page * per_page + i) for i in range(per_page)]
+        collected.extend(rows)
+        # Each step reports everything gathered so far, as the prompt asks
+        response = f"{filler}\n```json\n{json.dumps(collected)}\n```\n{filler}"
+        history.append(Step(action={"click_element": {"index": page}}, controller_response=response))
+    if with_done:
+        done = {"done": {"success": True, "text": json.dumps({"courses": collected})}}
+        history.append(Step(action=done, controller_response=""))
+    return history
+
+
+def timed(function, history, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(history)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'history':<28}{'size':>10}{'regex':>12}{'single pass':>14}")
+    for pages, per_page, with_done in ((10, 40, True), (20, 40, True), (20, 40, False), (30, 50, False)):
+        history = make_history(pages, per_page, with_done)
+        size = sum(len(step.controller_response) + len(json.dumps(step.action)) for step in history)
+        label = f"{pages} pages x {per_page}" + (" + done" if with_done else "")
+        legacy = timed(legacy_recover, history)
+        current = timed(recover_offerings, history)
+        print(f"{label:<28}{size / 1e6:>8.1f}MB{legacy * 1000:>10.0f}ms{current * 1000:>12.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
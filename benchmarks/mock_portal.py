@@ -0,0 +1,402 @@
+"""Local stand-in for the CUD student portal.
+
+Serves just enough of cudportal.cud.ac.ae for the extraction paths to run
+offline: a login form, the dashboard, Course Registration, and Course
+Offerings with its Show Filter panel, Term and Divisions dropdowns and a
+paginated results table. Row count, page size, pager style and server
+latency are configurable. Every page also loads a stylesheet, a web font,
+images and an analytics script from another host name, the kind of
+requests the lean browser profile skips. Run it on its own to click around:
+
+    python -m benchmarks.mock_portal --rows 600 --page-size 50
+
+or start it from a benchmark with `with MockPortal(...) as portal:`.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+import argparse
+import html
+import secrets
+import threading
+import time
+
+TERMS = ("Fall 2025", "Spring 2026", "Summer 2026")
+DIVISIONS = ("SEAST", "SBM", "SCI", "SMC")
+HEADER = (
+    "Course Code",
+    "Course Name",
+    "Credits",
+    "Instructor",
+    "Room",
+    "Days",
+    "Start Time",
+    "End Time",
+    "Max Enrollment",
+    "Total Enrollment",
+)
+SESSION_COOKIE = "ASPSESSIONID"
+
+_SUBJECTS = ("BCS", "MTH", "PHY", "ENG", "ECE", "MGT")
+_DAYS = ("MW", "TR", "MWF", "F", "S")
+_STARTS = (8 * 60, 9 * 60 + 30, 11 * 60, 12 * 60 + 30, 14 * 60, 15 * 60 + 30, 17 * 60)
+
+
+def _clock(minutes: int) -> str:
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def make_rows(count: int, division: str) -> List[List[str]]:
+    """Deterministic synthetic sections for one division"""
+    offset = DIVISIONS.index(division) * 1000 if division in DIVISIONS else 0
+    rows = []
+    for index in range(count):
+        number = offset + index
+        start = _STARTS[number % len(_STARTS)]
+        capacity = 25 + number % 4 * 5
+        rows.append(
+            [
+                f"{_SUBJECTS[number % len(_SUBJECTS)]}{100 + number // 3 % 400}",
+                f"Course {number // 3}",
+                str(3 + number % 2),
+                f"Dr. Instructor {number % 37}",
+                f"R{number % 60:03d}",
+                _DAYS[number % len(_DAYS)],
+                _clock(start),
+                _clock(start + 75),
+                str(capacity),
+                str(number * 7 % (capacity + 1)),
+            ]
+        )
+    return rows
+
+
+def _options(values, selected: Optional[str]) -> str:
+    return "".join(
+        f"<option{' selected' if value == selected else ''}>{value}</option>" for value in values
+    )
+
+
+def _cells(row, tag: str) -> str:
+    return "".join(f"<{tag}>{html.escape(cell)}</{tag}>" for cell in row)
+
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title>{head}</head>"
+        f"<body>{body}</body></html>"
+    )
+
+
+# Static assets every page pulls in, like the real portal's theme
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+STATIC = {
+    "/static/portal.css": (
+        "text/css",
+        b"@font-face { font-family: Portal; src: url(/static/portal.woff2); }"
+        b" body { font-family: Portal, sans-serif; }",
+    ),
+    "/static/portal.woff2": ("font/woff2", bytes(48 * 1024)),
+    "/static/logo.png": ("image/png", _PNG),
+    "/static/banner.png": ("image/png", _PNG),
+    "/static/analytics.js": ("application/javascript", b"window.tracked = true;"),
+}
+
+
+class MockPortal:
+    """Threaded mock portal on 127.0.0.1; port 0 picks a free port.
+
+    pager is "links" (numbered <a href> links, which the scripted flow
+    fetches in parallel) or "postback" (javascript: links that only work by
+    clicking in the page). Only a window of pager_window page numbers is
+    shown around the current page, like the real pager.
+    """
+
+    def __init__(
+        self,
+        rows: int = 500,
+        page_size: int = 50,
+        pager: str = "links",
+        pager_window: int = 10,
+        latency_ms: int = 0,
+        username: str = "student",
+        password: str = "secret",
+        port: int = 0,
+        assets: bool = True,
+    ):
+        if pager not in ("links", "postback"):
+            raise ValueError(f"Unknown pager style: {pager}")
+        self.rows = rows
+        self.page_size = max(1, page_size)
+        self.pager = pager
+        self.pager_window = max(1, pager_window)
+        self.latency_ms = latency_ms
+        self.username = username
+        self.password = password
+        self.assets = assets
+        self.sessions = set()
+        self.requests = 0
+        self._data: Dict[str, List[List[str]]] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/student/login.asp"
+
+    @property
+    def home_url(self) -> str:
+        return f"{self.base_url}/student/index.asp"
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.rows // self.page_size))
+
+    def start(self) -> "MockPortal":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-portal", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockPortal":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def third_party_url(self) -> str:
+        """Same server under another host name, so the browser sees another site"""
+        return self.base_url.replace("127.0.0.1", "localhost")
+
+    def _page(self, title: str, body: str) -> str:
+        if not self.assets:
+            return _page(title, body)
+        head = (
+            '<link rel="stylesheet" href="/static/portal.css">'
+            f'<script src="{self.third_party_url}/static/analytics.js"></script>'
+        )
+        banner = '<img src="/static/logo.png" alt="CUD"><img src="/static/banner.png" alt="">'
+        return _page(title, banner + body, head)
+
+    def division_rows(self, division: str) -> List[List[str]]:
+        if division not in self._data:
+            self._data[division] = make_rows(self.rows, division)
+        return self._data[division]
+
+    def set_enrollment(self, division: str, index: int, total: int):
+        """Change one section's Total Enrollment, as registration would"""
+        self.division_rows(division)[index][HEADER.index("Total Enrollment")] = str(total)
+
+    def _handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                portal.requests += 1
+                if portal.latency_ms:
+                    time.sleep(portal.latency_ms / 1000)
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path in STATIC:
+                    return self._static(*STATIC[url.path])
+                if url.path in ("/", "/student/login.asp"):
+                    return self._html(portal.login_form())
+                if not self._logged_in():
+                    return self._redirect("/student/login.asp")
+                routes = {
+                    "/student/index.asp": portal.dashboard,
+                    "/student/registration.asp": portal.registration,
+                }
+                if url.path in routes:
+                    return self._html(routes[url.path]())
+                if url.path == "/student/offerings.asp":
+                    return self._html(portal.offerings(query))
+                self.send_error(404)
+
+            def do_POST(self):
+                portal.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {
+                    key: values[0]
+                    for key, values in parse_qs(self.rfile.read(length).decode()).items()
+                }
+                if self.path.startswith("/student/login.asp"):
+                    if (
+                        form.get("username") == portal.username
+                        and form.get("password") == portal.password
+                    ):
+                        token = secrets.token_hex(8)
+                        portal.sessions.add(token)
+                        return self._redirect(
+                            "/student/index.asp",
+                            cookie=f"{SESSION_COOKIE}={token}; Path=/",
+                        )
+                    return self._html(portal.login_form("Invalid username or password"))
+                self.send_error(404)
+
+            def _logged_in(self) -> bool:
+                for part in (self.headers.get("Cookie") or "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == SESSION_COOKIE and value in portal.sessions:
+                        return True
+                return False
+
+            def _redirect(self, location: str, cookie: Optional[str] = None):
+                self.send_response(302)
+                self.send_header("Location", location)
+                if cookie:
+                    self.send_header("Set-Cookie", cookie)
+                self.end_headers()
+
+            def _static(self, content_type: str, body: bytes):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                # Every page load pays for its assets, as in a fresh context
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _html(self, text: str):
+                body = text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def login_form(self, error: str = "") -> str:
+        message = f"<p class='error'>{html.escape(error)}</p>" if error else ""
+        return self._page(
+            "Student Portal Login",
+            f"""<h1>CUD Student Portal</h1>{message}
+            <form method="post" action="/student/login.asp">
+              <label>Username <input name="username" type="text"></label>
+              <label>Password <input name="password" type="password"></label>
+              <input type="submit" value="Login">
+            </form>""",
+        )
+
+    def dashboard(self) -> str:
+        return self._page(
+            "Dashboard",
+            """<h1>Welcome</h1>
+            <ul>
+              <li><a href="/student/index.asp">Home</a></li>
+              <li><a href="/student/registration.asp">Course Registration</a></li>
+              <li><a href="/student/index.asp">Finance</a></li>
+            </ul>""",
+        )
+
+    def registration(self) -> str:
+        return self._page(
+            "Course Registration",
+            """<h1>Registration</h1>
+            <ul><li><a href="/student/offerings.asp">Course Offerings</a></li></ul>""",
+        )
+
+    def offerings(self, query: Dict[str, str]) -> str:
+        term = query.get("term", TERMS[0])
+        division = query.get("division")
+        panel = f"""
+            <button type="button"
+              onclick="document.getElementById('filter').style.display='block'">Show Filter</button>
+            <div id="filter" style="display:none">
+              <form method="get" action="/student/offerings.asp">
+                <label>Term <select name="term">{_options(TERMS, term)}</select></label>
+                <label>Divisions <select name="division">
+                  <option value="">-- Select --</option>{_options(DIVISIONS, division)}
+                </select></label>
+                <button type="submit">Apply Filter</button>
+              </form>
+            </div>"""
+        if not division:
+            return self._page("Course Offerings", f"<h1>Course Offerings</h1>{panel}")
+
+        rows = self.division_rows(division)
+        number = min(max(1, int(query.get("page", "1") or 1)), self.pages)
+        chunk = rows[(number - 1) * self.page_size : number * self.page_size]
+        table = (
+            f"<table id='offerings'><tr>{_cells(HEADER, 'th')}</tr>"
+            + "".join(f"<tr>{_cells(row, 'td')}</tr>" for row in chunk)
+            + "</table>"
+        )
+        return self._page(
+            "Course Offerings",
+            f"<h1>Course Offerings</h1>{panel}{table}{self._pager(term, division, number)}",
+        )
+
+    def _pager(self, term: str, division: str, current: int) -> str:
+        first = max(1, current - self.pager_window // 2)
+        last = min(self.pages, first + self.pager_window - 1)
+        links = []
+        for number in range(first, last + 1):
+            href = "/student/offerings.asp?" + urlencode(
+                {"term": term, "division": division, "page": number}
+            )
+            if number == current:
+                links.append(f"<span>{number}</span>")
+            elif self.pager == "links":
+                links.append(f'<a href="{href}">{number}</a>')
+            else:
+                links.append(
+                    f'<a href="javascript:void(0)" onclick="location.href=\'{href}\'">{number}</a>'
+                )
+        return f"<div class='pager'>{' '.join(links)}</div>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock CUD student portal")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--pager", choices=["links", "postback"], default="links")
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-assets", action="store_true", help="Serve bare HTML pages")
+    args = parser.parse_args()
+
+    portal = MockPortal(
+        rows=args.rows,
+        page_size=args.page_size,
+        pager=args.pager,
+        latency_ms=args.latency_ms,
+        port=args.port,
+        assets=not args.no_assets,
+    )
+    print(f"Mock portal at {portal.login_url} (user {portal.username} / {portal.password})")
+    portal.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
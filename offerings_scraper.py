@@ -1,9 +1,24 @@
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from src.agent_runner import AgentRunner
-from src.utils import get_filters_from_user, save_results
-from src.models import CourseOfferings
+from src.batch import BatchRunner, parse_divisions
+from src.browser_profile import PROFILES
+from src.extractor import LoginError, OfferingsExtractor
+from src.utils import get_filters_from_user
+from src.offerings_cache import OfferingsCache
+from src.query import compile_filters
+from src.seat_watcher import SeatWatcher, WebhookNotifier, desktop_notifier, log_notifier
+from src.session_cache import SessionCache
+from src.trajectory_cache import TrajectoryCache
+from src.storage import (
+    DEFAULT_RESULTS_PATH,
+    ResultsWriter,
+    export_csv,
+    export_excel,
+    write_results,
+)
 import os
+import argparse
 import asyncio
 import logging
 import getpass
@@ -16,7 +31,87 @@ logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
 
-async def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract CUD course offerings")
+    parser.add_argument(
+        "--export",
+        action="append",
+        choices=["csv", "xlsx"],
+        default=[],
+        help="Also export the results as results.csv and/or course_offerings.xlsx",
+    )
+    parser.add_argument(
+        "--divisions",
+        nargs="+",
+        metavar="DIVISION",
+        help='Scrape these divisions (or "all") concurrently after one login',
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="How many divisions to scrape at once with --divisions (default 3)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default="default",
+        help="Browser profile; lean runs headless and skips images, fonts, "
+        "stylesheets, third-party requests and agent screenshots",
+    )
+    watch = parser.add_argument_group("seat watching")
+    watch.add_argument(
+        "--watch",
+        nargs="+",
+        metavar="COURSE_CODE",
+        help="Instead of extracting, watch these courses' sections for enrollment changes",
+    )
+    watch.add_argument("--division", default="SEAST", help="Division to watch (default SEAST)")
+    watch.add_argument(
+        "--interval", type=float, default=60, help="Seconds between polls (default 60)"
+    )
+    watch.add_argument(
+        "--only-openings", action="store_true", help="Only report sections where a seat opens"
+    )
+    watch.add_argument("--desktop", action="store_true", help="Show desktop notifications")
+    watch.add_argument("--webhook", metavar="URL", help="POST every change to this URL as JSON")
+    return parser.parse_args()
+
+
+async def watch_seats(args):
+    username = input("Enter your CUD Portal username: ")
+    password = getpass.getpass("Enter your CUD Portal password: ")
+    notifiers = [log_notifier]
+    if args.desktop:
+        notifiers.append(desktop_notifier)
+    if args.webhook:
+        notifiers.append(WebhookNotifier(args.webhook))
+    extractor = OfferingsExtractor(
+        username=username,
+        password=password,
+        division=args.division,
+        session_cache=SessionCache(),
+        profile=args.profile,
+    )
+    watcher = SeatWatcher(
+        extractor,
+        args.watch,
+        notifiers=notifiers,
+        interval_seconds=args.interval,
+        only_openings=args.only_openings,
+    )
+    logger.info("Watching %s in %s; press Ctrl+C to stop.", ", ".join(args.watch), args.division)
+    await watcher.run()
+
+
+async def main(args):
+    if args.watch:
+        try:
+            await watch_seats(args)
+        except KeyboardInterrupt:
+            logger.warning("Stopped watching.")
+        return
+
     try:
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
@@ -26,28 +121,69 @@ async def main():
 
         username = input("Enter your CUD Portal username: ")
         password = getpass.getpass("Enter your CUD Portal password: ")
-        filters = get_filters_from_user()
+        while True:
+            filters = get_filters_from_user()
+            # Catch a malformed filter now rather than after the scrape
+            try:
+                compile_filters(filters)
+                break
+            except ValueError as e:
+                logger.error("Invalid filter: %s. Please enter the filters again.", e)
+
+        def make_runner(**overrides) -> AgentRunner:
+            return AgentRunner(
+                llm=llm,
+                username=username,
+                password=password,
+                filters=filters,
+                session_cache=SessionCache(),
+                offerings_cache=OfferingsCache(),
+                trajectory_cache=TrajectoryCache(),
+                profile=args.profile,
+                **overrides,
+            )
 
-        runner = AgentRunner(
-            llm=llm, username=username, password=password, filters=filters
-        )
-        logger.info("Running schedule extraction...")
+        results_path = os.path.join(os.getcwd(), DEFAULT_RESULTS_PATH)
+        df = None
+        if args.divisions:
+            batch_runner = BatchRunner(
+                make_runner, parse_divisions(args.divisions), concurrency=args.concurrency
+            )
+            logger.info("Running schedule extraction for several divisions...")
+            result = await batch_runner.run()
+            df = result.frame()
+            for division, error in result.errors.items():
+                logger.error("%s failed: %s", division, error)
+            if df.is_empty():
+                df = None
+            else:
+                write_results(df, results_path)
+        else:
+            runner = make_runner()
+            logger.info("Running schedule extraction...")
 
-        offerings: CourseOfferings = await runner.run()
+            # The results file is rewritten as each page comes in
+            writer = ResultsWriter(results_path)
+            async for batch in runner.stream():
+                df = writer.append(batch)
+                logger.info("Received %d courses (%d so far).", len(batch), len(df))
 
-        if offerings and offerings.courses:
-            save_results(offerings)
-            logger.info("Successfully saved %d courses.", len(offerings.courses))
+        if df is not None:
+            logger.info("Successfully saved %d courses to %s.", len(df), results_path)
+            if "csv" in args.export:
+                export_csv(df, os.path.join(os.getcwd(), "results.csv"))
+            if "xlsx" in args.export:
+                export_excel(df, os.path.join(os.getcwd(), "course_offerings.xlsx"))
         else:
             logger.warning("No course data extracted.")
 
-    except Exception as e:
-        logger.error("Login failed: Invalid username or password.", e)
+    except LoginError:
+        logger.error("Login failed: Invalid username or password.")
     except KeyboardInterrupt:
         logger.warning("Process interrupted by user.")
     except Exception as e:
-        logger.error("Unhandled Exception: %s", e)
+        logger.error("Extraction failed: %s: %s", type(e).__name__, e)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args()))
@@ -1,167 +1,332 @@
 from browser_use import Agent, Controller
-from src.models import CourseOfferings
-import re
-import json
+from browser_use.browser.browser import Browser
+from browser_use.browser.context import BrowserContext
+from src.browser_pool import BrowserPool
+from src.browser_profile import (
+    BrowserProfile,
+    apply_profile,
+    browser_config,
+    context_config,
+    get_profile,
+)
+from src.extractor import (
+    PORTAL_LOGIN_URL,
+    ExtractedPage,
+    ExtractionError,
+    LoginError,
+    OfferingsExtractor,
+    fingerprint_rows,
+)
+from src.models import Course, CourseOfferings
+from src.offerings_cache import DEFAULT_TERM, OfferingsCache
+from src.query import apply_filters
+from src.result_recovery import dedupe_courses, recover_offerings
+from src.run_trace import DEFAULT_TRACE_DIR, RunTracer
+from src.session_cache import (
+    PORTAL_HOME_URL,
+    SessionCache,
+    apply_storage_state,
+    restore_session,
+    save_agent_context,
+)
+from src.table_action import READ_TABLE_ACTION, TableCollector, register_table_action
+from src.trajectory_cache import TrajectoryCache, replay_trajectory
 import logging
 import traceback
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+# "scripted" only runs the Playwright flow, "agent" only the LLM agent and
+# "auto" tries the scripted flow first and falls back to the agent
+EXTRACTION_MODES = ("auto", "scripted", "agent")
+
 
 class AgentRunner:
-    def __init__(self, llm, username: str, password: str, filters: dict):
+    def __init__(
+        self,
+        llm,
+        username: str,
+        password: str,
+        filters: dict,
+        mode: str = "auto",
+        division: str = "SEAST",
+        max_concurrency: int = 4,
+        session_cache: Optional[SessionCache] = None,
+        offerings_cache: Optional[OfferingsCache] = None,
+        term: str = DEFAULT_TERM,
+        browser_pool: Optional[BrowserPool] = None,
+        trace_dir: Optional[str] = DEFAULT_TRACE_DIR,
+        login_url: str = PORTAL_LOGIN_URL,
+        home_url: str = PORTAL_HOME_URL,
+        trajectory_cache: Optional[TrajectoryCache] = None,
+        storage_state: Optional[dict] = None,
+        profile: Union[str, BrowserProfile] = "default",
+    ):
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode: {mode}")
         self.llm = llm
         self.username = username
         self.password = password
         self.filters = filters
-        # Use Controller with output_model for structured output
-        self.controller = Controller(output_model=CourseOfferings)
+        self.mode = mode
+        self.division = division
+        self.max_concurrency = max_concurrency
+        self.session_cache = session_cache
+        self.offerings_cache = offerings_cache
+        self.term = term
+        self.browser_pool = browser_pool
+        # Where agent run traces go; None turns tracing off
+        self.trace_dir = trace_dir
+        self.last_trace: Optional[str] = None
+        self.login_url = login_url
+        self.home_url = home_url
+        self.trajectory_cache = trajectory_cache
+        # A logged-in portal session shared by a batch of runners
+        self.storage_state = storage_state
+        # "lean" blocks non-essential resources and keeps screenshots from the LLM
+        self.profile = get_profile(profile)
+        # Table rows are read by a controller action instead of being
+        # transcribed by the LLM, so done only needs a short text
+        self.tables = TableCollector()
+        self.controller = Controller()
+        register_table_action(self.controller, self.tables)
+
+    def _navigation_steps(self) -> List[str]:
+        return [
+            f"Navigate to {self.login_url}",
+            "If a login form is shown, login with username and password provided; if the dashboard is already shown, skip this step",
+            "Wait for the dashboard to load completely",
+            'Find and click on the menu item related to "Course Registration"',
+            'Find and click on "Course Offerings" link or button',
+            "Wait for the page to load completely",
+            'Find and click on "Show Filter" button',
+            "Wait for filter options to appear",
+            f'Select "{self.division}" from the Divisions dropdown/selection field',
+            'Click the "Apply Filter" button',
+            "Wait for the filtered results to load completely",
+        ]
 
-    def _build_task(self) -> str:
-        # Insert filters into the formatted task string
+    def _navigation_key(self) -> str:
+        """Identifies the navigation part of the task for the trajectory cache"""
+        return "\n".join(self._navigation_steps())
+
+    def _build_task(self, navigated: bool = False) -> str:
+        """The agent's task; with navigated, only the extraction steps, for a
+        browser that is already on the filtered results"""
+        # The agent always scrapes everything; filters run locally afterwards
+        steps = [] if navigated else self._navigation_steps()
+        first = len(steps) + 1
+        steps += [
+            f'Call the "{READ_TABLE_ACTION}" action to read ALL rows of the results table. '
+            "It stores the rows itself, so never copy rows into your answer. "
+            "If the column mapping it reports is wrong, call it again with the corrected column_mapping",
+            f"Repeat step {first} for every remaining results page (follow the numbered page links until there is no page left), THEN STOP FOR 1 SECOND AND PROCEED TO THE NEXT STEP",
+            "Call done with a one-line summary of how many pages and courses were read",
+        ]
+        numbered = "\n".join(
+            f"        {number}. {step}" for number, step in enumerate(steps, start=1)
+        )
+        intro = (
+            f"The browser already shows the Course Offerings results filtered to {self.division}.\n        "
+            if navigated
+            else ""
+        )
+        fields = ", ".join(Course.model_fields)
         task = f"""
-        Follow these steps precisely:
-        1. Navigate to https://cudportal.cud.ac.ae/student/login.asp
-        2. Login with username and password provided
-        3. Wait for the dashboard to load completely
-        4. Find and click on the menu item related to "Course Registration"
-        5. Find and click on "Course Offerings" link or button
-        6. Wait for the page to load completely
-        7. Find and click on "Show Filter" button
-        8. Wait for filter options to appear
-        9. Select "SEAST" from the Divisions dropdown/selection field
-        10. Click the "Apply Filter" button
-        11. Wait for the filtered results to load completely
-        12. Extract ALL course information from the table with these field names:
-            - course_code {self.filters.get("course_code")}
-            - course_name {self.filters.get("course_name")}
-            - credits {self.filters.get("credits")}
-            - instructor {self.filters.get("instructor")}
-            - room {self.filters.get("room")}
-            - days {self.filters.get("days")}
-            - start_time {self.filters.get("start_time")}
-            - end_time {self.filters.get("end_time")}
-            - max_enrollment {self.filters.get("max_enrollment")}
-            - total_enrollment {self.filters.get("total_enrollment")}
-        13. Repeat step 12 for the page 2 and 3 if available, THEN STOP FOR 1 SECOND AND PROCEED TO THE NEXT STEP
-        14. Combine all extracted course data into a single JSON array formatted to match the CourseOfferings schema
-
-        IMPORTANT: After extracting data from each page, always return the full set of course data you've collected so far.
-        Store the extracted course data after each page and maintain this data throughout the entire process.
-        Do not return an empty array when you're done.
+        {intro}Follow these steps precisely:
+{numbered}
+
+        IMPORTANT: Only if the {READ_TABLE_ACTION} action fails on a page, extract that page's rows yourself
+        as a JSON array of objects with these field names: {fields}, and include it in your done text.
         """
         return task
 
-    async def run(self) -> CourseOfferings:
-        task = self._build_task()
-        agent = Agent(
+    async def run(self, refresh: bool = False) -> CourseOfferings:
+        """Return the courses matching self.filters"""
+        offerings = await self.run_all(refresh)
+        if not offerings:
+            return offerings
+        return apply_filters(offerings, self.filters)
+
+    async def run_all(self, refresh: bool = False) -> CourseOfferings:
+        """Return every course in the division, ignoring self.filters"""
+        pages = {}
+        async for number, courses in self._stream_pages(refresh):
+            pages[number] = courses
+        if not pages:
+            return None
+        return CourseOfferings(
+            courses=[course for number in sorted(pages) for course in pages[number]]
+        )
+
+    async def stream(self, refresh: bool = False) -> AsyncIterator[List[Course]]:
+        """Yield the courses matching self.filters one results page at a time.
+
+        Pages are yielded as soon as they are read, which is not
+        necessarily page order. The agent fallback has no notion of pages
+        and yields everything as one batch at the end.
+        """
+        async for _, courses in self._stream_pages(refresh):
+            batch = apply_filters(CourseOfferings(courses=courses), self.filters).courses
+            if batch:
+                yield batch
+
+    async def _stream_pages(self, refresh: bool) -> AsyncIterator[Tuple[int, List[Course]]]:
+        # Serve repeated lookups from a fresh snapshot without a browser
+        if self.offerings_cache and not refresh:
+            snapshot = self.offerings_cache.get(self.term, self.division)
+            if snapshot:
+                logger.info(
+                    f"Using cached offerings snapshot v{snapshot.version} "
+                    f"({snapshot.age():.0f}s old)"
+                )
+                for number in sorted(snapshot.pages):
+                    yield number, snapshot.pages[number].courses
+                return
+
+        if self.mode != "agent":
+            yielded = False
+            try:
+                async for number, courses in self._stream_scripted():
+                    yielded = True
+                    yield number, courses
+                return
+            except ExtractionError as e:
+                # Falling back after some pages went out would repeat them, and
+                # the agent cannot log in with credentials the portal rejected
+                if self.mode == "scripted" or yielded or isinstance(e, LoginError):
+                    raise
+                logger.warning(f"Scripted extraction failed, falling back to agent: {e}")
+
+        offerings = await self._run_agent()
+        if offerings and offerings.courses:
+            yield 1, offerings.courses
+
+    async def _stream_scripted(self) -> AsyncIterator[Tuple[int, List[Course]]]:
+        extractor = OfferingsExtractor(
+            username=self.username,
+            password=self.password,
+            division=self.division,
+            term=None if self.term == DEFAULT_TERM else self.term,
+            max_concurrency=self.max_concurrency,
+            session_cache=self.session_cache,
+            login_url=self.login_url,
+            home_url=self.home_url,
+            storage_state=self.storage_state,
+            profile=self.profile,
+        )
+        if not self.offerings_cache:
+            async for page in extractor.stream_pages():
+                yield page.number, page.courses
+            return
+
+        # Only pages whose fingerprint changed since the last snapshot get re-parsed
+        previous = self.offerings_cache.get(self.term, self.division, allow_stale=True)
+        pages = {}
+        async for page in extractor.stream_pages(
+            previous.fingerprints() if previous else None
+        ):
+            pages[page.number] = page
+            if page.courses is None:
+                yield page.number, previous.pages[page.number].courses
+            else:
+                yield page.number, page.courses
+        self.offerings_cache.merge_pages(self.term, self.division, pages, "scripted")
+
+    async def _run_agent(self) -> CourseOfferings:
+        if self.browser_pool:
+            result, replayed = await self.browser_pool.run_async(self._agent_job)
+        else:
+            browser = Browser(config=browser_config(self.profile))
+            context = BrowserContext(browser=browser, config=context_config(self.profile))
+            try:
+                result, replayed = await self._agent_job(browser, context)
+            finally:
+                await context.close()
+                await browser.close()
+
+        if self.tables.pages:
+            # Rows the table action parsed, plus any the LLM had to copy itself
+            copied = recover_offerings(result)
+            courses = dedupe_courses(self.tables.courses(), copied.courses if copied else [])
+            offerings = CourseOfferings(courses=courses)
+        else:
+            offerings = self._process_result(result)
+        if offerings and offerings.courses and self.trajectory_cache and not replayed:
+            # A run that planned its own way to the results is worth replaying
+            self.trajectory_cache.record(self._navigation_key(), result)
+        if offerings and offerings.courses and self.offerings_cache:
+            # The agent has no notion of pages, so its result is stored as one
+            rows = [list(course.model_dump().values()) for course in offerings.courses]
+            page = ExtractedPage(1, fingerprint_rows(rows), offerings.courses)
+            self.offerings_cache.merge_pages(self.term, self.division, {1: page}, "agent")
+        return offerings
+
+    def _make_agent(self, task: str, llm, browser: Browser, context: BrowserContext) -> Agent:
+        return Agent(
             task=task,
-            llm=self.llm,
+            llm=llm,
             sensitive_data={"user": self.username, "password": self.password},
             controller=self.controller,
             max_actions_per_step=4,
+            browser=browser,
+            browser_context=context,
+            use_vision=self.profile.use_vision,
         )
 
-        result = await agent.run(max_steps=100)
-        return self._process_result(result)
+    async def _agent_job(self, browser: Browser, context: BrowserContext):
+        """Run the extraction agent in the given context, starting logged in
+        when a cached portal session is available and replaying a recorded
+        navigation when there is one. Returns (result, replayed)."""
+        if self.storage_state:
+            await apply_storage_state(context, self.storage_state)
+        elif self.session_cache:
+            await restore_session(context, self.username, self.session_cache)
+        self.tables.clear()
+        await apply_profile(context, self.profile, (self.login_url, self.home_url))
+
+        tracer = RunTracer("extract", self.trace_dir) if self.trace_dir else None
+        self.last_trace = tracer.path if tracer else None
+        llm = tracer.instrument(self.llm) if tracer else self.llm
+
+        replayed = False
+        if self.trajectory_cache:
+            agent = self._make_agent(self._build_task(navigated=True), llm, browser, context)
+            trajectory = self.trajectory_cache.load(self._navigation_key(), agent.AgentOutput)
+            if trajectory:
+                replayed = await replay_trajectory(agent, trajectory, self.login_url)
+                if not replayed:
+                    # The portal changed under the recording; plan from scratch
+                    logger.info("Recorded navigation no longer works, re-planning with the LLM")
+                    self.trajectory_cache.invalidate(self._navigation_key())
+        if not replayed:
+            agent = self._make_agent(self._build_task(), llm, browser, context)
+
+        try:
+            if tracer:
+                result = await agent.run(
+                    max_steps=100,
+                    on_step_start=tracer.on_step_start,
+                    on_step_end=tracer.on_step_end,
+                )
+            else:
+                result = await agent.run(max_steps=100)
+        finally:
+            if tracer:
+                tracer.close()
+        if self.session_cache:
+            await save_agent_context(context, self.username, self.session_cache)
+        return result, replayed
 
     def _process_result(self, result):
         """Process the structured result from the agent"""
         try:
-            # Initialize an empty list to store all courses
-            all_courses = []
-
-            # Case 1: Check if we have a final_result method with structured output
-            if hasattr(result, "final_result") and callable(
-                getattr(result, "final_result")
-            ):
-                final_result = result.final_result()
-                if final_result:
-                    try:
-                        # Try to directly parse the final result
-                        return CourseOfferings.model_validate_json(final_result)
-                    except Exception as e:
-                        logger.warning(f"Failed to parse final result: {e}")
-                        # Continue with other extraction methods
-
-            # Case 2: Process all steps in the agent history to find extracted content
-            if hasattr(result, "__iter__"):
-                for step in result:
-                    # Check for done action with successful result
-                    if (
-                        hasattr(step, "action")
-                        and isinstance(step.action, dict)
-                        and "done" in step.action
-                    ):
-                        done_data = step.action.get("done", {})
-                        if (
-                            isinstance(done_data, dict)
-                            and done_data.get("success")
-                            and "text" in done_data
-                        ):
-                            # Try to extract JSON from the text
-                            text = done_data["text"]
-                            try:
-                                # Look for JSON pattern in the text
-                                json_match = re.search(
-                                    r'(\{.*"courses"\s*:\s*\[.*\].*\})', text, re.DOTALL
-                                )
-                                if json_match:
-                                    json_str = json_match.group(1)
-                                    courses_data = json.loads(json_str)
-                                    return CourseOfferings.model_validate(courses_data)
-                            except Exception as e:
-                                logger.warning(
-                                    f"Failed to extract JSON from done action: {e}"
-                                )
-
-                    # Check for controller_response which contains extracted data
-                    if (
-                        hasattr(step, "controller_response")
-                        and step.controller_response
-                    ):
-                        response = str(step.controller_response)
-
-                        # Look for JSON format in code blocks
-                        json_match = re.search(
-                            r"```json\s*([\s\S]*?)\s*```", response, re.DOTALL
-                        )
-                        if json_match:
-                            try:
-                                json_str = json_match.group(1)
-                                data = json.loads(json_str)
-
-                                # Case: Full CourseOfferings format
-                                if isinstance(data, dict) and "courses" in data:
-                                    return CourseOfferings.model_validate(data)
-
-                                # Case: Just an array of courses
-                                if isinstance(data, list):
-                                    all_courses.extend(data)
-
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"Could not decode JSON: {e}")
-
-                        # Try alternative pattern matching for JSON arrays
-                        json_array_match = re.search(
-                            r"\[\s*\{.*?\}\s*(?:,\s*\{.*?\}\s*)*\]", response, re.DOTALL
-                        )
-                        if json_array_match:
-                            try:
-                                courses_data = json.loads(json_array_match.group(0))
-                                if isinstance(courses_data, list):
-                                    all_courses.extend(courses_data)
-                            except json.JSONDecodeError:
-                                pass
-
-            # Return the accumulated courses
-            if all_courses:
-                return CourseOfferings(courses=all_courses)
-
-            logger.error("Could not extract course data from agent result")
-            return None
-
+            offerings = recover_offerings(result)
         except Exception as e:
             logger.error(f"Error processing result: {str(e)}")
             logger.error(traceback.format_exc())
             return None
+        if offerings is None:
+            logger.error("Could not extract course data from agent result")
+        return offerings
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import asyncio
+import logging
+
+import polars as pl
+
+from src.agent_runner import AgentRunner
+from src.extractor import OfferingsExtractor
+from src.models import CourseOfferings
+from src.storage import offerings_frame
+
+logger = logging.getLogger(__name__)
+
+ALL_DIVISIONS = "all"
+
+
+@dataclass
+class BatchResult:
+    """Offerings per division, plus the error of every division that failed"""
+
+    offerings: Dict[str, CourseOfferings] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def frame(self) -> pl.DataFrame:
+        """One results frame for every division, tagged with a division column"""
+        frames = [
+            offerings_frame(offerings.courses).with_columns(pl.lit(division).alias("division"))
+            for division, offerings in self.offerings.items()
+            if offerings.courses
+        ]
+        if not frames:
+            return pl.DataFrame()
+        return pl.concat(frames).select("division", pl.exclude("division"))
+
+
+class BatchRunner:
+    """Extracts several divisions concurrently with one shared login.
+
+    The portal is logged into once up front (which also reads the Divisions
+    dropdown when "all" is asked for) and every worker starts from that
+    session. At most concurrency divisions run at a time, each through its
+    own AgentRunner built by make_runner, and a failing division is retried
+    with backoff without holding up the others.
+    """
+
+    def __init__(
+        self,
+        make_runner: Callable[..., AgentRunner],
+        divisions: Union[str, Sequence[str]] = ALL_DIVISIONS,
+        concurrency: int = 3,
+        retries: int = 2,
+        backoff_seconds: float = 5.0,
+    ):
+        self.make_runner = make_runner
+        self.divisions = divisions
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.backoff_seconds = backoff_seconds
+
+    async def run(self, refresh: bool = False) -> BatchResult:
+        # make_runner takes keyword overrides for AgentRunner
+        probe = self.make_runner()
+        discover = self.divisions == ALL_DIVISIONS
+        state, found = await OfferingsExtractor(
+            username=probe.username,
+            password=probe.password,
+            session_cache=probe.session_cache,
+            login_url=probe.login_url,
+            home_url=probe.home_url,
+            profile=probe.profile,
+        ).login_state(list_divisions=discover)
+        divisions = found if discover else list(dict.fromkeys(self.divisions))
+        logger.info(
+            f"Extracting {len(divisions)} divisions, {self.concurrency} at a time: "
+            f"{', '.join(divisions)}"
+        )
+
+        result = BatchResult()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(division: str):
+            for attempt in range(self.retries + 1):
+                async with semaphore:
+                    try:
+                        runner = self.make_runner(division=division, storage_state=state)
+                        offerings = await runner.run(refresh)
+                        result.offerings[division] = offerings or CourseOfferings(courses=[])
+                        result.errors.pop(division, None)
+                        logger.info(
+                            f"{division}: {len(result.offerings[division].courses)} courses"
+                        )
+                        return
+                    except Exception as e:
+                        result.errors[division] = str(e)
+                        logger.warning(f"{division}: attempt {attempt + 1} failed: {e}")
+                # Back off outside the semaphore so other divisions keep going
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff_seconds * (attempt + 1))
+
+        await asyncio.gather(*(worker(division) for division in divisions))
+        if result.errors:
+            logger.error(f"Failed divisions: {', '.join(sorted(result.errors))}")
+        # Keep the order the divisions were listed in
+        result.offerings = {
+            division: result.offerings[division]
+            for division in divisions
+            if division in result.offerings
+        }
+        return result
+
+
+def parse_divisions(values: Optional[List[str]]) -> Union[str, List[str]]:
+    """Divisions from the command line: names, comma lists, or "all" """
+    names = [name.strip() for value in values or [] for name in value.split(",") if name.strip()]
+    if any(name.lower() == ALL_DIVISIONS for name in names):
+        return ALL_DIVISIONS
+    return names
@@ -0,0 +1,159 @@
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+import asyncio
+import atexit
+import logging
+import threading
+
+from browser_use import BrowserConfig
+from browser_use.browser.browser import Browser
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A job gets a warm browser and a fresh context of its own
+Job = Callable[[Browser, BrowserContext], Awaitable[T]]
+
+
+class BrowserPool:
+    """Process-wide pool of warm browser-use browsers.
+
+    Every request runs in its own context on a pooled browser, at most
+    max_browsers at a time. A browser is retired after max_uses requests or
+    as soon as it has crashed. Playwright objects are bound to the event
+    loop that created them while Streamlit starts a new loop for every run,
+    so the pool owns one long-lived loop on a background thread and all
+    browser work is scheduled onto it.
+    """
+
+    def __init__(
+        self,
+        config: Optional[BrowserConfig] = None,
+        max_browsers: int = 2,
+        max_uses: int = 20,
+    ):
+        self.config = config or BrowserConfig()
+        self.max_browsers = max(1, max_browsers)
+        self.max_uses = max(1, max_uses)
+        self.closed = False
+        self._idle: List[Browser] = []
+        # Requests served so far by each live browser, keyed by id()
+        self._uses: Dict[int, int] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="browser-pool", daemon=True
+        )
+        self._thread.start()
+        # Binds to the pool's loop on first use
+        self._slots = asyncio.Semaphore(self.max_browsers)
+        atexit.register(self.close)
+
+    def _call(self, coroutine):
+        if self.closed:
+            coroutine.close()
+            raise RuntimeError("Browser pool is closed")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def warm(self):
+        """Start a browser in the background so the next request finds one"""
+        if not self.closed:
+            self._call(self._warm())
+
+    def run(
+        self, job: Job, context_config: Optional[BrowserContextConfig] = None
+    ) -> T:
+        """Run job on a pooled browser, blocking the calling thread"""
+        return self._call(self._run(job, context_config)).result()
+
+    async def run_async(
+        self, job: Job, context_config: Optional[BrowserContextConfig] = None
+    ) -> T:
+        """Run job on a pooled browser from any other event loop"""
+        return await asyncio.wrap_future(self._call(self._run(job, context_config)))
+
+    def close(self, timeout: float = 30):
+        """Close every browser and stop the pool's loop"""
+        if self.closed:
+            return
+        try:
+            self._call(self._shutdown()).result(timeout)
+        except Exception as e:
+            logger.warning(f"Browser pool did not shut down cleanly: {e}")
+        self.closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    @property
+    def live(self) -> int:
+        return len(self._uses)
+
+    async def _launch(self) -> Browser:
+        browser = Browser(config=self.config)
+        self._uses[id(browser)] = 0
+        try:
+            await browser.get_playwright_browser()
+        except Exception:
+            await self._retire(browser)
+            raise
+        logger.info(f"Started pooled browser ({self.live}/{self.max_browsers})")
+        return browser
+
+    async def _warm(self):
+        if not self.closed and not self._idle and self.live < self.max_browsers:
+            try:
+                self._idle.append(await self._launch())
+            except Exception as e:
+                logger.warning(f"Could not pre-start a browser: {e}")
+
+    async def _run(self, job: Job, context_config: Optional[BrowserContextConfig]):
+        async with self._slots:
+            if self.closed:
+                raise RuntimeError("Browser pool is closed")
+            browser = self._idle.pop() if self._idle else await self._launch()
+            self._uses[id(browser)] += 1
+            context = BrowserContext(
+                browser=browser, config=context_config or self.config.new_context_config
+            )
+            try:
+                return await job(browser, context)
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Could not close browser context: {e}")
+                await self._release(browser)
+
+    async def _release(self, browser: Browser):
+        if self.closed:
+            await self._retire(browser)
+        elif not _is_alive(browser):
+            logger.warning("Pooled browser crashed, replacing it")
+            await self._retire(browser)
+        elif self.live > self.max_browsers:
+            # A warm-up raced a request and left one browser too many
+            await self._retire(browser)
+        elif self._uses[id(browser)] >= self.max_uses:
+            logger.info(f"Recycling pooled browser after {self.max_uses} uses")
+            await self._retire(browser)
+        else:
+            self._idle.append(browser)
+
+    async def _retire(self, browser: Browser):
+        self._uses.pop(id(browser), None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"Could not close pooled browser: {e}")
+
+    async def _shutdown(self):
+        # Browsers still serving a request are retired when they come back
+        self.closed = True
+        idle, self._idle = self._idle, []
+        for browser in idle:
+            await self._retire(browser)
+
+
+def _is_alive(browser: Browser) -> bool:
+    playwright_browser = getattr(browser, "playwright_browser", None)
+    return playwright_browser is None or playwright_browser.is_connected()
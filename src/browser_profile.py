@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+import logging
+
+from browser_use import BrowserConfig
+from browser_use.browser.context import BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+# Resource types a DOM-only run never needs
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """How the browsers used for extraction are launched and what they load.
+
+    block_resources aborts images, media, fonts and stylesheets, plus any
+    subresource from a host that no page of the run navigated to (analytics,
+    CDNs, trackers). use_vision sends screenshots to the agent's LLM along
+    with the DOM. headless only applies to the agent's browser; the scripted
+    flow runs headless unless OfferingsExtractor is told otherwise.
+    """
+
+    name: str
+    headless: bool = False
+    block_resources: bool = False
+    use_vision: bool = True
+    viewport: Optional[Dict[str, int]] = None
+    # Only the agent honours these; the scripted flow waits on its own
+    context_options: Dict[str, object] = field(default_factory=dict)
+
+
+PROFILES = {
+    "default": BrowserProfile("default"),
+    "lean": BrowserProfile(
+        "lean",
+        headless=True,
+        block_resources=True,
+        use_vision=False,
+        viewport={"width": 1024, "height": 768},
+        context_options={
+            "highlight_elements": False,
+            "minimum_wait_page_load_time": 0.25,
+            "wait_for_network_idle_page_load_time": 0.5,
+        },
+    ),
+}
+
+
+def get_profile(profile) -> BrowserProfile:
+    """A BrowserProfile from itself or its name"""
+    if isinstance(profile, BrowserProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile}")
+    return PROFILES[profile]
+
+
+def context_config(profile: BrowserProfile) -> BrowserContextConfig:
+    options = dict(viewport_expansion=0, **profile.context_options)
+    if profile.viewport:
+        options.update(
+            window_width=profile.viewport["width"],
+            window_height=profile.viewport["height"],
+            no_viewport=False,
+        )
+    return BrowserContextConfig(**options)
+
+
+def browser_config(profile: BrowserProfile) -> BrowserConfig:
+    """browser-use config for a profile"""
+    return BrowserConfig(headless=profile.headless, new_context_config=context_config(profile))
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class ResourceBlocker:
+    """Playwright route handler that drops what a profile does not need.
+
+    Navigations always go through and make their host first-party for the
+    rest of the run, so an agent can still follow links to other sites.
+    """
+
+    def __init__(self, allowed_hosts: Iterable[str] = ()):
+        self.allowed_hosts: Set[str] = {host.lower() for host in allowed_hosts if host}
+        self.blocked = 0
+
+    def first_party(self, url: str) -> bool:
+        host = _host(url)
+        return any(
+            host == allowed or host.endswith(f".{allowed}") for allowed in self.allowed_hosts
+        )
+
+    async def handle(self, route):
+        request = route.request
+        if request.is_navigation_request():
+            self.allowed_hosts.add(_host(request.url))
+            return await route.continue_()
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or not self.first_party(request.url):
+            self.blocked += 1
+            return await route.abort()
+        await route.continue_()
+
+
+async def new_context(browser, profile: BrowserProfile, allowed_urls: Iterable[str] = (), **kwargs):
+    """Playwright context for the scripted flow, with the profile applied"""
+    if profile.viewport:
+        kwargs.setdefault("viewport", dict(profile.viewport))
+    context = await browser.new_context(**kwargs)
+    if profile.block_resources:
+        blocker = ResourceBlocker(_host(url) for url in allowed_urls)
+        await context.route("**/*", blocker.handle)
+    return context
+
+
+async def apply_profile(context, profile: BrowserProfile, allowed_urls: Iterable[str] = ()):
+    """Install a profile's request blocking in a browser-use BrowserContext"""
+    if not profile.block_resources:
+        return None
+    session = await context.get_session()
+    blocker = ResourceBlocker(_host(url) for url in allowed_urls)
+    await session.context.route("**/*", blocker.handle)
+    return blocker
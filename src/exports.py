@@ -0,0 +1,92 @@
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import io
+import json
+import logging
+import threading
+
+import polars as pl
+
+from src.storage import COURSE_COLUMNS, export_excel
+
+logger = logging.getLogger(__name__)
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def csv_bytes(df: pl.DataFrame) -> bytes:
+    return df.select(COURSE_COLUMNS).write_csv().encode("utf-8")
+
+
+def xlsx_bytes(df: pl.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    export_excel(df, buffer)
+    return buffer.getvalue()
+
+
+# Format name -> (MIME type, renderer)
+EXPORT_FORMATS: Dict[str, Tuple[str, Callable[[pl.DataFrame], bytes]]] = {
+    "csv": ("text/csv", csv_bytes),
+    "xlsx": (XLSX_MIME, xlsx_bytes),
+}
+
+
+def frame_fingerprint(df: pl.DataFrame) -> str:
+    """Content fingerprint of a results frame that also depends on row order.
+
+    Indexes cached under it refer to rows by position, so the same rows in
+    another order must not share a key.
+    """
+    if df.is_empty():
+        return "0"
+    row_hashes = array("Q", df.select(COURSE_COLUMNS).hash_rows(seed=0).to_list())
+    return f"{df.height}:{hashlib.sha256(row_hashes.tobytes()).hexdigest()[:32]}"
+
+
+def export_key(data_fingerprint: str, filters: dict) -> str:
+    """Key for one filtered view of one data set"""
+    payload = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha256(f"{data_fingerprint}|{payload}".encode()).hexdigest()
+
+
+def failed(future: Future) -> bool:
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class ExportService:
+    """Renders downloads on a thread pool and memoizes them by export key.
+
+    Nothing is rendered until a format is requested, the bytes never touch
+    the working directory, and a finished export is reused by every rerun
+    (and every session) that asks for the same key again.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 32):
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="export")
+        self.max_entries = max_entries
+        self.exports: "OrderedDict[Tuple[str, str], Future]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, key: str, fmt: str, df: pl.DataFrame) -> Future:
+        """Start rendering df as fmt, unless that export already exists"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt!r}")
+        with self.lock:
+            future = self.exports.get((key, fmt))
+            # A failed export is kept so it can be reported, and retried here
+            if future is not None and not failed(future):
+                self.exports.move_to_end((key, fmt))
+                return future
+            future = self.executor.submit(EXPORT_FORMATS[fmt][1], df)
+            self.exports[(key, fmt)] = future
+            while len(self.exports) > self.max_entries:
+                self.exports.popitem(last=False)
+        return future
+
+    def get(self, key: str, fmt: str) -> Optional[Future]:
+        with self.lock:
+            return self.exports.get((key, fmt))
+
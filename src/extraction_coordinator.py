@@ -0,0 +1,129 @@
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+import polars as pl
+
+from src.offerings_cache import DEFAULT_TERM
+
+logger = logging.getLogger(__name__)
+
+Scope = Tuple[str, str]
+# Called with the rows read so far
+RowsCallback = Callable[[pl.DataFrame], None]
+# Runs one extraction, reporting progress through its argument
+Fetch = Callable[[RowsCallback], Awaitable[Optional[pl.DataFrame]]]
+
+
+def scope_key(term: Optional[str], division: str) -> Scope:
+    """Case- and whitespace-insensitive (term, division) key"""
+
+    def normalize(value: str) -> str:
+        return " ".join(value.split()).casefold()
+
+    return normalize(term or DEFAULT_TERM), normalize(division)
+
+
+@dataclass
+class _Flight:
+    scope: Scope
+    future: Future = field(default_factory=Future)
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    task: Optional[asyncio.Task] = None
+    waiters: int = 0
+    rows: Optional[pl.DataFrame] = None
+    listeners: List[RowsCallback] = field(default_factory=list)
+    # Every waiter left, so the extraction is being cancelled
+    abandoned: bool = False
+
+    def report(self, rows: pl.DataFrame):
+        self.rows = rows
+        for listener in list(self.listeners):
+            listener(rows)
+
+
+class ExtractionCoordinator:
+    """Process-wide single-flight for offerings extractions.
+
+    Requests for a scope that is already being extracted join the running
+    extraction instead of starting another browser, so N users asking for
+    the same term and division at once cost one scrape. The first request's
+    fetch runs as a task of its own: cancelling any one waiter leaves it
+    running for the rest, and it is only cancelled once every waiter has
+    gone. Each waiter gets its own clone of the result, which shares the
+    column buffers and cannot be modified through another waiter's frame.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Scope, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> Dict[Scope, int]:
+        """Waiters per scope currently being extracted"""
+        with self._lock:
+            return {scope: flight.waiters for scope, flight in self._flights.items()}
+
+    async def extract(
+        self,
+        term: Optional[str],
+        division: str,
+        fetch: Fetch,
+        on_rows: Optional[RowsCallback] = None,
+    ) -> Optional[pl.DataFrame]:
+        """Result of fetch for this scope, shared with concurrent callers"""
+        scope = scope_key(term, division)
+        with self._lock:
+            flight = self._flights.get(scope)
+            leader = flight is None or flight.abandoned
+            if leader:
+                flight = _Flight(scope)
+                flight.loop = asyncio.get_running_loop()
+                flight.task = flight.loop.create_task(self._fly(flight, fetch))
+                self._flights[scope] = flight
+            flight.waiters += 1
+            if on_rows is not None:
+                flight.listeners.append(on_rows)
+        if not leader:
+            logger.info(
+                f"Joining the extraction of {scope[1]}/{scope[0]} already in progress "
+                f"({flight.waiters} waiting)"
+            )
+            if on_rows is not None and flight.rows is not None:
+                on_rows(flight.rows)
+
+        try:
+            # Shielded so a cancelled waiter does not cancel the shared future
+            df = await asyncio.shield(asyncio.wrap_future(flight.future))
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                if on_rows is not None and on_rows in flight.listeners:
+                    flight.listeners.remove(on_rows)
+                if flight.waiters == 0 and not flight.future.done():
+                    flight.abandoned = True
+                    if self._flights.get(scope) is flight:
+                        del self._flights[scope]
+            if flight.abandoned and not flight.future.done():
+                logger.info(
+                    f"Every waiter left, cancelling the extraction of {scope[1]}/{scope[0]}"
+                )
+                flight.loop.call_soon_threadsafe(flight.task.cancel)
+        return None if df is None else df.clone()
+
+    async def _fly(self, flight: _Flight, fetch: Fetch):
+        try:
+            df = await fetch(flight.report)
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except Exception as e:
+            flight.future.set_exception(e)
+        else:
+            flight.future.set_result(df)
+        finally:
+            with self._lock:
+                if self._flights.get(flight.scope) is flight:
+                    del self._flights[flight.scope]
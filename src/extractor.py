@@ -0,0 +1,492 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import json
+import logging
+
+from playwright.async_api import Browser, Page
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
+
+from src.browser_profile import BrowserProfile, get_profile, new_context
+from src.models import Course, CourseOfferings, standardize_field_name
+from src.session_cache import PORTAL_HOME_URL, SessionCache, probe_session
+
+logger = logging.getLogger(__name__)
+
+PORTAL_LOGIN_URL = "https://cudportal.cud.ac.ae/student/login.asp"
+
+# Serializes every table on the page in one round trip: a list of tables,
+# each a list of rows, each a list of trimmed cell texts.
+TABLES_JS = """
+() => Array.from(document.querySelectorAll("table")).map(table =>
+    Array.from(table.rows).map(row =>
+        Array.from(row.cells).map(cell => cell.innerText.trim())
+    )
+)
+"""
+
+# Numbered pager links as [page number, href]; href is null for postback
+# links that cannot be opened in another tab.
+_PAGER_JS = """
+(selector) => Array.from(document.querySelectorAll(selector))
+    .filter(a => /^\\d+$/.test(a.innerText.trim()))
+    .map(a => [
+        parseInt(a.innerText.trim(), 10),
+        a.href && !a.href.startsWith("javascript:") ? a.href : null,
+    ])
+"""
+
+
+@dataclass
+class PortalSelectors:
+    """Playwright selectors for the pages the scripted flow walks through"""
+
+    username_input: str = "input[name*='user' i]"
+    password_input: str = "input[type='password']"
+    login_submit: str = "input[type='submit'], button[type='submit']"
+    course_registration: str = "text=Course Registration"
+    course_offerings: str = "text=Course Offerings"
+    show_filter: str = "text=Show Filter"
+    term_select: str = "select[name*='term' i]"
+    division_select: str = "select[name*='div' i]"
+    apply_filter: str = "text=Apply Filter"
+    results_table: str = "table"
+    pager_links: str = "a"
+
+
+class ExtractionError(Exception):
+    """Raised when the scripted flow cannot find an element it relies on"""
+
+
+class LoginError(ExtractionError):
+    """The portal rejected the username and password"""
+
+
+@dataclass
+class ExtractedPage:
+    """One results page; courses is None when its fingerprint was unchanged"""
+
+    number: int
+    fingerprint: str
+    courses: Optional[List[Course]] = None
+
+
+def map_header(header: List[str]) -> Dict[int, str]:
+    """Map column positions to Course field names"""
+    mapping = {}
+    for index, label in enumerate(header):
+        field = standardize_field_name(label)
+        if field and field not in mapping.values():
+            mapping[index] = field
+    return mapping
+
+
+def parse_offerings_table(
+    rows: List[List[str]], mapping: Optional[Dict[int, str]] = None
+) -> List[Course]:
+    """Parse a serialized offerings table (header row first) into courses.
+
+    mapping overrides the column position -> Course field mapping that is
+    otherwise inferred from the header labels.
+    """
+    if not rows:
+        return []
+
+    mapping = mapping or map_header(rows[0])
+    if "course_code" not in mapping.values():
+        raise ExtractionError("Offerings table has no course code column")
+
+    courses = []
+    for cells in rows[1:]:
+        # Skip spacer, pager and group header rows
+        if len(cells) < len(rows[0]) or not any(cells):
+            continue
+        record = {field: "" for field in Course.model_fields}
+        for index, field in mapping.items():
+            record[field] = cells[index]
+        if record["course_code"]:
+            courses.append(Course(**record))
+    return courses
+
+
+def fingerprint_rows(rows: List[List[str]]) -> str:
+    """Stable content hash of a serialized table"""
+    return hashlib.sha256(json.dumps(rows, separators=(",", ":")).encode()).hexdigest()
+
+
+def pick_offerings_table(tables: List[List[List[str]]]) -> List[List[str]]:
+    """Return the table whose header maps onto the most Course fields"""
+    best, best_score = None, 0
+    for rows in tables:
+        if not rows:
+            continue
+        score = len(map_header(rows[0]))
+        if score > best_score:
+            best, best_score = rows, score
+    # A real offerings table carries at least code, name and a schedule column
+    if best is None or best_score < 3:
+        raise ExtractionError("Could not locate the course offerings table")
+    return best
+
+
+class OfferingsExtractor:
+    """Scripted Playwright flow that reads Course Offerings without an LLM"""
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        division: str = "SEAST",
+        term: Optional[str] = None,
+        login_url: str = PORTAL_LOGIN_URL,
+        home_url: str = PORTAL_HOME_URL,
+        session_cache: Optional[SessionCache] = None,
+        selectors: Optional[PortalSelectors] = None,
+        headless: bool = True,
+        timeout_ms: int = 15000,
+        max_concurrency: int = 4,
+        storage_state: Optional[dict] = None,
+        profile: Union[str, BrowserProfile] = "default",
+    ):
+        self.username = username
+        self.password = password
+        self.division = division
+        self.term = term
+        self.login_url = login_url
+        self.home_url = home_url
+        self.session_cache = session_cache
+        self.selectors = selectors or PortalSelectors()
+        # The scripted flow never needs a window, so unlike the agent it does
+        # not follow the profile's headless setting unless asked to
+        self.headless = headless
+        self.timeout_ms = timeout_ms
+        self.max_concurrency = max(1, max_concurrency)
+        # A logged-in state shared by the caller, tried before the cache
+        self.storage_state = storage_state
+        self.profile = get_profile(profile)
+
+    async def run(self) -> CourseOfferings:
+        pages = await self.run_pages()
+        courses = [course for number in sorted(pages) for course in pages[number].courses]
+        logger.info(
+            f"Scripted extraction read {len(courses)} courses from {len(pages)} pages"
+        )
+        return CourseOfferings(courses=courses)
+
+    async def run_pages(
+        self, known_fingerprints: Optional[Dict[int, str]] = None
+    ) -> Dict[int, ExtractedPage]:
+        """Read every results page, skipping the parse of pages whose
+        fingerprint matches known_fingerprints"""
+        return {page.number: page async for page in self.stream_pages(known_fingerprints)}
+
+    async def stream_pages(
+        self, known_fingerprints: Optional[Dict[int, str]] = None
+    ) -> AsyncIterator[ExtractedPage]:
+        """Like run_pages, but yield each page as soon as it has been read.
+
+        Pages arrive in completion order, not page order.
+        """
+        async with async_playwright() as playwright:
+            browser = await self._launch(playwright)
+            try:
+                page = await self._open_session(browser)
+                await self._open_offerings(page)
+                await self._apply_filter(page)
+                async for extracted in self._iter_pages(
+                    browser, page, known_fingerprints or {}
+                ):
+                    yield extracted
+            finally:
+                await browser.close()
+
+    @asynccontextmanager
+    async def open_results(self) -> AsyncIterator["ResultsSession"]:
+        """Log in once and keep the browser open for repeated reads of the
+        filtered results"""
+        async with async_playwright() as playwright:
+            browser = await self._launch(playwright)
+            try:
+                page = await self._open_session(browser)
+                yield ResultsSession(self, browser, page)
+            finally:
+                await browser.close()
+
+    async def _launch(self, playwright) -> Browser:
+        try:
+            return await playwright.chromium.launch(headless=self.headless)
+        except PlaywrightError as e:
+            # No browser installed, or a headed launch without a display
+            raise ExtractionError(f"Could not launch Chromium: {e}") from e
+
+    async def _iter_pages(
+        self, browser: Browser, page: Page, known: Dict[int, str]
+    ) -> AsyncIterator[ExtractedPage]:
+        """Read the first results page, then every other page it links to"""
+        yield await self._read_page(page, 1, known)
+        seen = {1}
+        links = await self._discover_pages(page)
+
+        # Postback pagers only work in the page that rendered them
+        if any(href is None for href in links.values()):
+            while links:
+                number = min(links)
+                await self._click(
+                    page, f"{self.selectors.pager_links} >> text='{number}'", f"page {number}"
+                )
+                await self._settle(page, f"page {number}")
+                seen.add(number)
+                yield await self._read_page(page, number, known)
+                links = {
+                    n: href
+                    for n, href in (await self._discover_pages(page)).items()
+                    if n not in seen
+                }
+            return
+
+        # Every page opens in its own context cloned from the logged-in session
+        state = await page.context.storage_state()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(number: int, href: str):
+            async with semaphore:
+                context = await self._new_context(browser, storage_state=state)
+                try:
+                    tab = await context.new_page()
+                    await self._goto(tab, href, f"page {number}")
+                    return (
+                        await self._read_page(tab, number, known),
+                        await self._discover_pages(tab),
+                    )
+                finally:
+                    await context.close()
+
+        # Long pagers only show a window of page numbers, so keep following
+        # the links found on fetched pages until no new page turns up
+        tasks = set()
+
+        def schedule(found: Dict[int, Optional[str]]):
+            for number, href in found.items():
+                if number not in seen and href is not None:
+                    seen.add(number)
+                    tasks.add(asyncio.create_task(fetch(number, href)))
+
+        schedule(links)
+        try:
+            while tasks:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                tasks.clear()
+                tasks.update(pending)
+                for task in done:
+                    extracted, found = task.result()
+                    yield extracted
+                    schedule(found)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _discover_pages(self, page: Page) -> Dict[int, Optional[str]]:
+        """Return the numbered pager links other than page 1"""
+        links = await page.evaluate(_PAGER_JS, self.selectors.pager_links)
+        return {number: href for number, href in links if number > 1}
+
+    async def _click(self, page: Page, selector: str, what: str):
+        try:
+            await page.click(selector)
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError(f"Could not find {what} ({selector})") from e
+
+    async def _goto(self, page: Page, url: str, what: str):
+        try:
+            await page.goto(url)
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError(f"Timed out opening {what} ({url})") from e
+
+    async def _settle(self, page: Page, what: str):
+        """Wait for the network to go quiet after a navigation"""
+        try:
+            await page.wait_for_load_state("networkidle")
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError(f"Timed out waiting for {what} to load") from e
+
+    async def _open_session(self, browser: Browser) -> Page:
+        """Open a logged-in page, reusing a shared or cached session when it
+        still works"""
+        if self.storage_state:
+            page = await self._resume(browser, self.storage_state)
+            if page:
+                return page
+            logger.info("Shared portal session was rejected, logging in again")
+
+        state = self.session_cache.load(self.username) if self.session_cache else None
+        if state:
+            page = await self._resume(browser, state)
+            if page:
+                return page
+            logger.info("Cached portal session was rejected, logging in again")
+            self.session_cache.invalidate(self.username)
+
+        context = await self._new_context(browser)
+        page = await context.new_page()
+        await self._login(page)
+        if self.session_cache:
+            self.session_cache.save(self.username, await context.storage_state())
+        return page
+
+    async def _new_context(self, browser: Browser, **kwargs):
+        context = await new_context(
+            browser, self.profile, (self.login_url, self.home_url), **kwargs
+        )
+        context.set_default_timeout(self.timeout_ms)
+        return context
+
+    async def _resume(self, browser: Browser, state: dict) -> Optional[Page]:
+        context = await self._new_context(browser, storage_state=state)
+        if await probe_session(context, self.home_url):
+            logger.info("Reusing portal session")
+            page = await context.new_page()
+            await self._goto(page, self.home_url, "the portal dashboard")
+            return page
+        await context.close()
+        return None
+
+    async def login_state(self, list_divisions: bool = False) -> Tuple[dict, List[str]]:
+        """Log in once and return the session's storage state, to share with
+        other extractors, plus the Divisions options when asked for"""
+        async with async_playwright() as playwright:
+            browser = await self._launch(playwright)
+            try:
+                page = await self._open_session(browser)
+                divisions = await self._list_divisions(page) if list_divisions else []
+                return await page.context.storage_state(), divisions
+            finally:
+                await browser.close()
+
+    async def _list_divisions(self, page: Page) -> List[str]:
+        await self._open_offerings(page)
+        await self._click(page, self.selectors.show_filter, "the Show Filter button")
+        labels = await page.eval_on_selector_all(
+            f"{self.selectors.division_select} option",
+            "options => options.map(option => option.textContent.trim())",
+        )
+        # Drop placeholders such as "-- Select --" or "All"
+        divisions = [
+            label
+            for label in labels
+            if label
+            and not label.startswith("-")
+            and "select" not in label.lower()
+            and label.lower() != "all"
+        ]
+        if not divisions:
+            raise ExtractionError("Could not find any options in the Divisions dropdown")
+        return divisions
+
+    async def _login(self, page: Page):
+        selectors = self.selectors
+        await self._goto(page, self.login_url, "the login page")
+        try:
+            await page.fill(selectors.username_input, self.username)
+            await page.fill(selectors.password_input, self.password)
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError("Could not find the login form") from e
+        await self._click(page, selectors.login_submit, "the login button")
+        await self._settle(page, "the login")
+
+        # Still looking at a password field means the portal rejected us
+        if await page.locator(selectors.password_input).count():
+            raise LoginError("Login failed: still on the login page")
+
+    async def _open_offerings(self, page: Page):
+        selectors = self.selectors
+        await self._click(page, selectors.course_registration, "Course Registration")
+        await self._settle(page, "Course Registration")
+        await self._click(page, selectors.course_offerings, "Course Offerings")
+        await self._settle(page, "Course Offerings")
+
+    async def _apply_filter(self, page: Page):
+        selectors = self.selectors
+        await self._click(page, selectors.show_filter, "the Show Filter button")
+        if self.term:
+            try:
+                await page.select_option(selectors.term_select, label=self.term)
+            except PlaywrightTimeoutError as e:
+                raise ExtractionError("Could not find the Term dropdown") from e
+        try:
+            await page.select_option(selectors.division_select, label=self.division)
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError("Could not find the Divisions dropdown") from e
+        await self._click(page, selectors.apply_filter, "the Apply Filter button")
+        await self._settle(page, "the filtered results")
+
+    async def _read_table(self, page: Page) -> List[List[str]]:
+        try:
+            await page.wait_for_selector(self.selectors.results_table)
+        except PlaywrightTimeoutError as e:
+            raise ExtractionError("No results table after applying the filter") from e
+        return pick_offerings_table(await page.evaluate(TABLES_JS))
+
+    async def _read_page(self, page: Page, number: int, known: Dict[int, str]) -> ExtractedPage:
+        rows = await self._read_table(page)
+        fingerprint = fingerprint_rows(rows)
+        if known.get(number) == fingerprint:
+            return ExtractedPage(number, fingerprint)
+        return ExtractedPage(number, fingerprint, parse_offerings_table(rows))
+
+
+class ResultsSession:
+    """A logged-in portal page that re-reads the filtered offerings on demand.
+
+    Every read starts again from the dashboard and applies the filter, so
+    the counts are current, but the login and the browser are reused.
+    """
+
+    def __init__(self, extractor: OfferingsExtractor, browser: Browser, page: Page):
+        self.extractor = extractor
+        self.browser = browser
+        self.page = page
+
+    async def _reload(self):
+        await self.extractor._goto(self.page, self.extractor.home_url, "the portal dashboard")
+        await self.extractor._settle(self.page, "the portal dashboard")
+        await self.extractor._open_offerings(self.page)
+        await self.extractor._apply_filter(self.page)
+
+    async def read_pages(self, numbers: Optional[Iterable[int]] = None) -> Dict[int, ExtractedPage]:
+        """Read the given results pages, or every page when numbers is None.
+
+        Raises ExtractionError when a requested page is not in the pager.
+        """
+        extractor, page = self.extractor, self.page
+        await self._reload()
+        if numbers is None:
+            return {
+                extracted.number: extracted
+                async for extracted in extractor._iter_pages(self.browser, page, {})
+            }
+
+        wanted = sorted(set(numbers))
+        pages = {}
+        if 1 in wanted:
+            pages[1] = await extractor._read_page(page, 1, {})
+        links = await extractor._discover_pages(page)
+        for number in wanted:
+            if number == 1:
+                continue
+            if number not in links:
+                raise ExtractionError(f"Results page {number} is no longer in the pager")
+            if links[number]:
+                await extractor._goto(page, links[number], f"page {number}")
+            else:
+                await extractor._click(
+                    page, f"{extractor.selectors.pager_links} >> text='{number}'", f"page {number}"
+                )
+            await extractor._settle(page, f"page {number}")
+            pages[number] = await extractor._read_page(page, number, {})
+            # Windowed pagers only link to pages near the current one
+            links.update(await extractor._discover_pages(page))
+        return pages
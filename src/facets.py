@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+# Columns the Course Search tab offers as dropdown filters
+FACETS = ("course_code", "instructor", "days")
+
+# Bit positions set in each byte value, for unpacking bitmaps
+_BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+
+
+def rows_to_bitmap(rows: Iterable[int]) -> int:
+    """Pack row ids into an int bitmap, bit i set for row i"""
+    buffer = bytearray()
+    for row in rows:
+        byte = row >> 3
+        if byte >= len(buffer):
+            buffer.extend(bytes(byte - len(buffer) + 1))
+        buffer[byte] |= 1 << (row & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bitmap_rows(bitmap: int) -> List[int]:
+    """Row ids of the set bits, in ascending order"""
+    rows = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte, value in enumerate(data):
+        if value:
+            base = byte << 3
+            rows.extend(base + bit for bit in _BYTE_BITS[value])
+    return rows
+
+
+class FacetIndex:
+    """Distinct values and a value -> row bitmap for each facet column.
+
+    Built once per data set. A combination of facet filters is then the
+    intersection of a few int bitmaps instead of a scan per filter.
+    """
+
+    __slots__ = ("size", "values", "bitmaps")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Dict[str, List[str]] = {}
+        self.bitmaps: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pl.DataFrame, facets: Sequence[str] = FACETS) -> "FacetIndex":
+        index = cls(df.height)
+        rows = df.with_row_index("row")
+        for facet in facets:
+            groups = rows.group_by(facet).agg(pl.col("row"))
+            bitmaps = {
+                "" if value is None else str(value): rows_to_bitmap(ids)
+                for value, ids in groups.iter_rows()
+            }
+            index.bitmaps[facet] = bitmaps
+            index.values[facet] = sorted(bitmaps)
+        logger.debug(f"Indexed {len(facets)} facets over {df.height} rows")
+        return index
+
+    @property
+    def all(self) -> int:
+        return (1 << self.size) - 1
+
+    def options(self, facet: str) -> List[str]:
+        return self.values[facet]
+
+    def select(self, selections: Dict[str, Optional[str]], bitmap: Optional[int] = None) -> int:
+        """Rows matching every selected value; None leaves a facet unfiltered"""
+        result = self.all if bitmap is None else bitmap
+        for facet, value in selections.items():
+            if value is not None:
+                result &= self.bitmaps[facet].get(value, 0)
+        return result
@@ -0,0 +1,99 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Set
+
+from src.sections import DAY_LETTERS, SectionTable
+
+ALL_DAYS = (1 << len(DAY_LETTERS)) - 1
+
+
+class _DayIndex:
+    """Meetings on one weekday, sorted by start and by end"""
+
+    __slots__ = ("starts", "rows_by_start", "ends", "rows_by_end", "max_duration")
+
+    def __init__(self, meetings: List[tuple]):
+        by_start = sorted(meetings)
+        self.starts = [start for start, _, _ in by_start]
+        self.rows_by_start = [row for _, _, row in by_start]
+        by_end = sorted((end, row) for _, end, row in meetings)
+        self.ends = [end for end, _ in by_end]
+        self.rows_by_end = [row for _, row in by_end]
+        self.max_duration = max((end - start for start, end, _ in meetings), default=0)
+
+
+class IntervalIndex:
+    """Sorted-endpoint index over the meeting times of a SectionTable.
+
+    Every weekday keeps its meetings sorted by start and by end, plus the
+    longest meeting on that day. "Ends before" and "starts after" are a
+    single bisect. A meeting can only overlap [start, end) if it starts in
+    (start - longest, end), so overlap and window queries bisect that
+    range and check the few candidates in it. All queries return sorted
+    row ids into the table.
+    """
+
+    def __init__(self, table: SectionTable):
+        self.table = table
+        meetings = [[] for _ in DAY_LETTERS]
+        for row in range(len(table)):
+            start, end, days = table.start[row], table.end[row], table.days[row]
+            if not 0 <= start < end:
+                continue
+            for day in range(len(DAY_LETTERS)):
+                if days & (1 << day):
+                    meetings[day].append((start, end, row))
+        self.days = [_DayIndex(day_meetings) for day_meetings in meetings]
+
+    def _each_day(self, days: int):
+        return (self.days[day] for day in range(len(DAY_LETTERS)) if days & (1 << day))
+
+    def ends_before(self, time: int, days: int = ALL_DAYS) -> List[int]:
+        """Sections with a meeting on one of the days that ends by time"""
+        rows: Set[int] = set()
+        for index in self._each_day(days):
+            rows.update(index.rows_by_end[: bisect_right(index.ends, time)])
+        return sorted(rows)
+
+    def starts_after(self, time: int, days: int = ALL_DAYS) -> List[int]:
+        """Sections with a meeting on one of the days that starts at or after time"""
+        rows: Set[int] = set()
+        for index in self._each_day(days):
+            rows.update(index.rows_by_start[bisect_left(index.starts, time) :])
+        return sorted(rows)
+
+    def overlapping(self, start: int, end: int, days: int = ALL_DAYS) -> List[int]:
+        """Sections that meet at some point in [start, end) on one of the days"""
+        rows: Set[int] = set()
+        table_end = self.table.end
+        for index in self._each_day(days):
+            low = bisect_right(index.starts, start - index.max_duration)
+            high = bisect_left(index.starts, end)
+            rows.update(
+                row for row in index.rows_by_start[low:high] if table_end[row] > start
+            )
+        return sorted(rows)
+
+    def within(self, start: int, end: int, days: int = ALL_DAYS) -> List[int]:
+        """Sections that only meet on the given days, inside [start, end].
+
+        Answers "what fits if I am free between 10:00 and 13:00 on MW".
+        """
+        rows: Set[int] = set()
+        table = self.table
+        for index in self._each_day(days):
+            low = bisect_left(index.starts, start)
+            high = bisect_right(index.starts, end)
+            rows.update(
+                row
+                for row in index.rows_by_start[low:high]
+                if table.end[row] <= end and not table.days[row] & ~days
+            )
+        return sorted(rows)
+
+    def overlaps_section(self, row: int) -> List[int]:
+        """Other sections that clash with the section at row"""
+        table = self.table
+        if not 0 <= table.start[row] < table.end[row]:
+            return []
+        clashes = self.overlapping(table.start[row], table.end[row], table.days[row])
+        return [other for other in clashes if other != row]
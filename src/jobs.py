@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = frozenset({DONE, FAILED, CANCELLED})
+
+
+@dataclass
+class Job:
+    """Status and progress of one background job.
+
+    The job's coroutine reports progress through progress(); the fields are
+    plain attributes so the UI thread can read them at any time.
+    """
+
+    id: str
+    name: str
+    owner: str = ""
+    status: str = QUEUED
+    step: int = 0
+    rows: int = 0
+    message: str = ""
+    result: Any = None
+    error: str = ""
+    # Whatever the job has produced so far, shown while it runs
+    partial: Any = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def progress(
+        self,
+        step: Optional[int] = None,
+        rows: Optional[int] = None,
+        message: Optional[str] = None,
+        partial: Any = None,
+    ):
+        """Report the current step, rows read so far, a status line and the
+        partial result"""
+        if step is not None:
+            self.step = step
+        if rows is not None:
+            self.rows = rows
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    def _finish(self, status: str, error: str = ""):
+        self.status = status
+        self.error = error
+        self.finished = time.time()
+
+
+# A job is an async function of its own Job, for reporting progress
+JobFunction = Callable[[Job], Awaitable[Any]]
+
+
+class JobManager:
+    """Runs long async jobs on a background event loop thread.
+
+    Submitting returns at once with a Job whose id the UI keeps and polls,
+    so the script never blocks on a run and a page reload can pick its jobs
+    up again by owner. At most max_running jobs run at a time and the rest
+    wait as queued. Cancelling a job cancels its task, which unwinds any
+    browser work it is awaiting. Only the newest max_history finished jobs
+    are kept.
+    """
+
+    def __init__(self, max_running: int = 2, max_history: int = 50):
+        self.max_running = max(1, max_running)
+        self.max_history = max(0, max_history)
+        self.closed = False
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="job-manager", daemon=True
+        )
+        self._thread.start()
+        # Binds to the manager's loop on first use
+        self._slots = asyncio.Semaphore(self.max_running)
+        atexit.register(self.close)
+
+    def submit(self, name: str, function: JobFunction, owner: str = "") -> Job:
+        """Queue function(job) and return its Job without waiting"""
+        if self.closed:
+            raise RuntimeError("Job manager is closed")
+        job = Job(id=uuid.uuid4().hex[:8], name=name, owner=owner)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        future = asyncio.run_coroutine_threadsafe(self._run(job, function), self._loop)
+        self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._forget(job))
+        logger.info(f"Queued job {job.id}: {name}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None) -> List[Job]:
+        """Jobs newest first, optionally only those of one owner"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if owner is None or job.owner == owner]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it had already finished"""
+        future = self._futures.get(job_id)
+        job = self.get(job_id)
+        if future is None or job is None or job.done:
+            return False
+        future.cancel()
+        return True
+
+    def close(self, timeout: float = 10):
+        """Cancel every unfinished job and stop the loop"""
+        if self.closed:
+            return
+        self.closed = True
+        for future in list(self._futures.values()):
+            future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    async def _run(self, job: Job, function: JobFunction):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started = time.time()
+                job.result = await function(job)
+        except asyncio.CancelledError:
+            job._finish(CANCELLED)
+            logger.info(f"Cancelled job {job.id}")
+            raise
+        except Exception as e:
+            job._finish(FAILED, str(e))
+            logger.error(f"Job {job.id} failed: {e}")
+        else:
+            job._finish(DONE)
+            logger.info(f"Finished job {job.id} in {job.elapsed:.1f}s")
+
+    def _forget(self, job: Job):
+        self._futures.pop(job.id, None)
+        # Cancelled before its coroutine ever started
+        if not job.done:
+            job._finish(CANCELLED)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
@@ -16,4 +16,46 @@ class Course(BaseModel):
 
 
 class CourseOfferings(BaseModel):
-    courses: List[Course] = Field(description="List of course offerings")
\ No newline at end of file
+    courses: List[Course] = Field(description="List of course offerings")
+
+def standardize_field_name(label: str):
+    """Map a loose column label or JSON key onto a Course field name"""
+    key = label.strip().lower()
+    if not key:
+        return None
+    # Check the specific labels first: "Instructor Name" is not a course name
+    if "instructor" in key or "professor" in key or "faculty" in key:
+        return "instructor"
+    if ("max" in key or "cap" in key) and ("enr" in key or "seat" in key or "cap" in key):
+        return "max_enrollment"
+    if ("total" in key or "enrolled" in key) and ("enr" in key or "seat" in key):
+        return "total_enrollment"
+    if key.startswith(("start", "begin")):
+        return "start_time"
+    if key.startswith(("end", "finish")):
+        return "end_time"
+    if "code" in key:
+        return "course_code"
+    if "name" in key or "title" in key:
+        return "course_name"
+    if "credit" in key or key in ("cr", "cr.", "hrs"):
+        return "credits"
+    if "room" in key or "location" in key:
+        return "room"
+    if "day" in key:
+        return "days"
+    return None
+
+
+# Fields that identify one section of a course across repeated extractions.
+# The portal shows no section number or CRN, so TBA, online and internship
+# sections of one course are only told apart by their instructor.
+SECTION_IDENTITY_FIELDS = ("course_code", "days", "start_time", "end_time", "room", "instructor")
+
+
+def section_key(record: dict) -> tuple:
+    """Whitespace- and case-insensitive identity of a course row"""
+    return tuple(
+        " ".join(str(record.get(field) or "").split()).upper()
+        for field in SECTION_IDENTITY_FIELDS
+    )
@@ -0,0 +1,141 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+import glob
+import logging
+import os
+import re
+import time
+
+from src.extractor import ExtractedPage
+from src.models import Course, CourseOfferings
+from src.session_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk snapshot layout changes; older files are ignored
+SCHEMA_VERSION = 1
+DEFAULT_TERM = "current"
+
+
+class PageSnapshot(BaseModel):
+    fingerprint: str = Field(description="Content hash of the page's table")
+    courses: List[Course] = Field(description="Courses parsed from the page")
+
+
+class OfferingsSnapshot(BaseModel):
+    schema_version: int = SCHEMA_VERSION
+    term: str
+    division: str
+    version: int = Field(default=1, description="Incremented on every refresh")
+    created_at: float = Field(description="When the first snapshot was taken")
+    refreshed_at: float = Field(description="When the snapshot was last refreshed")
+    source: str = Field(description="Extraction path: scripted or agent")
+    changed_pages: List[int] = Field(
+        default_factory=list, description="Pages re-parsed by the last refresh"
+    )
+    pages: Dict[int, PageSnapshot] = Field(default_factory=dict)
+
+    def offerings(self) -> CourseOfferings:
+        return CourseOfferings(
+            courses=[
+                course for number in sorted(self.pages) for course in self.pages[number].courses
+            ]
+        )
+
+    def fingerprints(self) -> Dict[int, str]:
+        return {number: page.fingerprint for number, page in self.pages.items()}
+
+    def age(self) -> float:
+        return time.time() - self.refreshed_at
+
+
+class OfferingsCache:
+    """Versioned on-disk snapshots of course offerings, keyed by term and division"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = 6 * 3600):
+        self.cache_dir = os.path.join(cache_dir, "offerings")
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, term: str, division: str) -> str:
+        key = f"{term}__{division}".lower()
+        return os.path.join(self.cache_dir, re.sub(r"[^a-z0-9_.-]+", "-", key) + ".json")
+
+    def is_fresh(self, snapshot: OfferingsSnapshot) -> bool:
+        return snapshot.age() < self.ttl_seconds
+
+    def get(self, term: str, division: str, allow_stale: bool = False) -> Optional[OfferingsSnapshot]:
+        """Return the snapshot for a scope, or None if missing or past its TTL"""
+        snapshot = self._read(self._path(term, division))
+        if snapshot is None:
+            return None
+        if not allow_stale and not self.is_fresh(snapshot):
+            return None
+        return snapshot
+
+    def latest(self) -> Optional[OfferingsSnapshot]:
+        """Return the most recently refreshed snapshot of any scope"""
+        snapshots = [self._read(path) for path in glob.glob(os.path.join(self.cache_dir, "*.json"))]
+        snapshots = [snapshot for snapshot in snapshots if snapshot is not None]
+        return max(snapshots, key=lambda s: s.refreshed_at, default=None)
+
+    def _read(self, path: str) -> Optional[OfferingsSnapshot]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = OfferingsSnapshot.model_validate_json(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable offerings snapshot {path}: {e}")
+            return None
+        if snapshot.schema_version != SCHEMA_VERSION:
+            return None
+        return snapshot
+
+    def put(self, snapshot: OfferingsSnapshot):
+        path = self._path(snapshot.term, snapshot.division)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot.model_dump_json())
+        os.replace(tmp_path, path)
+
+    def merge_pages(
+        self,
+        term: str,
+        division: str,
+        pages: Dict[int, ExtractedPage],
+        source: str,
+    ) -> OfferingsSnapshot:
+        """Fold freshly extracted pages into the stored snapshot and save it.
+
+        Pages returned without courses had an unchanged fingerprint and keep
+        their cached rows; pages that disappeared from the portal are dropped.
+        """
+        now = time.time()
+        previous = self.get(term, division, allow_stale=True)
+        merged, changed = {}, []
+        for number, page in pages.items():
+            if page.courses is None and previous and number in previous.pages:
+                merged[number] = previous.pages[number]
+            else:
+                merged[number] = PageSnapshot(
+                    fingerprint=page.fingerprint, courses=page.courses or []
+                )
+                changed.append(number)
+
+        snapshot = OfferingsSnapshot(
+            term=term,
+            division=division,
+            version=previous.version + 1 if previous else 1,
+            created_at=previous.created_at if previous else now,
+            refreshed_at=now,
+            source=source,
+            changed_pages=sorted(changed),
+            pages=merged,
+        )
+        self.put(snapshot)
+        logger.info(
+            f"Offerings snapshot {term}/{division} v{snapshot.version}: "
+            f"{len(changed)} of {len(merged)} pages changed"
+        )
+        return snapshot
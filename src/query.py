@@ -0,0 +1,119 @@
+from typing import List, Optional, Tuple, Union
+import logging
+import operator
+import re
+
+import polars as pl
+
+from src.models import CourseOfferings
+from src.sections import parse_days, parse_int, parse_time
+from src.storage import frame_to_offerings, offerings_frame
+
+logger = logging.getLogger(__name__)
+
+# Text filters match a case-insensitive substring
+TEXT_FIELDS = ("course_code", "course_name", "instructor", "room")
+
+# Numeric filters accept an optional comparison, e.g. ">=3" or "<30";
+# the operator used when none is given depends on the field
+NUMERIC_FIELDS = {
+    "credits": ("credits_value", "=="),
+    "start_time": ("start_minute", ">="),
+    "end_time": ("end_minute", "<="),
+    "max_enrollment": ("max_enrollment_value", "=="),
+    "total_enrollment": ("total_enrollment_value", "=="),
+}
+
+_OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_COMPARISON_RE = re.compile(r"^\s*(==|!=|>=|<=|=|>|<)?\s*(.*?)\s*$")
+
+
+def _split_comparison(value: str, default: str) -> Tuple[str, str]:
+    match = _COMPARISON_RE.match(value)
+    return match.group(1) or default, match.group(2)
+
+
+def compile_filters(filters: dict) -> Optional[pl.Expr]:
+    """Compile a filters dict (as from get_filters_from_user) into one predicate.
+
+    Returns None when no filter is set. Raises ValueError for a value that
+    cannot be parsed, so a typo is not silently treated as "no filter".
+    """
+    predicates: List[pl.Expr] = []
+    for field in TEXT_FIELDS:
+        value = (filters.get(field) or "").strip()
+        if value:
+            predicates.append(
+                pl.col(field).str.to_lowercase().str.contains(value.lower(), literal=True)
+            )
+
+    for field, (column, default) in NUMERIC_FIELDS.items():
+        value = (filters.get(field) or "").strip()
+        if not value:
+            continue
+        op, operand = _split_comparison(value, default)
+        parse = parse_time if field.endswith("_time") else parse_int
+        number = parse(operand)
+        if number < 0:
+            raise ValueError(f"Could not parse the {field} filter: {value!r}")
+        # Unknown values are stored as -1 and never match a comparison
+        predicates.append((pl.col(column) >= 0) & _OPERATORS[op](pl.col(column), number))
+
+    days = (filters.get("days") or "").strip()
+    if days:
+        mask = parse_days(days)
+        if not mask:
+            raise ValueError(f"Could not parse the days filter: {days!r}")
+        # Only sections that meet on the requested days, and no others
+        predicates.append((pl.col("day_mask") != 0) & ((pl.col("day_mask") & ~mask) == 0))
+
+    if not predicates:
+        return None
+    return pl.all_horizontal(predicates)
+
+
+class OfferingsQuery:
+    """Filters a full offerings set locally with a lazy Polars query.
+
+    The source is a typed frame (see src.storage), either built once per
+    scrape or scanned straight from the results file, in which case the
+    filters are pushed down into the read. Every filter combination is
+    just a new lazy plan over it.
+    """
+
+    def __init__(self, source: Union[pl.DataFrame, pl.LazyFrame]):
+        self.source = source.lazy()
+
+    @classmethod
+    def from_offerings(cls, offerings: CourseOfferings) -> "OfferingsQuery":
+        return cls(offerings_frame(offerings.courses))
+
+    def lazy(self, filters: dict) -> pl.LazyFrame:
+        query = self.source
+        predicate = compile_filters(filters)
+        if predicate is not None:
+            query = query.filter(predicate)
+        return query
+
+    def frame(self, filters: dict) -> pl.DataFrame:
+        return self.lazy(filters).collect()
+
+    def run(self, filters: dict) -> CourseOfferings:
+        """Return the courses that match every filter"""
+        offerings = frame_to_offerings(self.frame(filters))
+        logger.info(f"{len(offerings.courses)} courses match the filters")
+        return offerings
+
+
+def apply_filters(offerings: CourseOfferings, filters: dict) -> CourseOfferings:
+    if compile_filters(filters) is None:
+        return offerings
+    return OfferingsQuery.from_offerings(offerings).run(filters)
@@ -0,0 +1,227 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import itertools
+import logging
+
+from src.sections import DAY_LETTERS, MINUTES_PER_DAY, Section
+from src.solver import Schedule, ScheduleSolver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchedulePreferences:
+    """Weights of the penalties a schedule is ranked by; lower cost is better"""
+
+    day_weight: float = 10.0  # per day on campus
+    gap_weight: float = 0.05  # per idle minute between classes on the same day
+    passing_minutes: int = 15  # breaks up to this long are not counted as gaps
+    early_start: int = 9 * 60  # classes starting before this are early
+    early_weight: float = 5.0  # per early class meeting
+    preferred_instructors: Sequence[str] = ()
+    instructor_weight: float = 3.0  # per section not taught by a preferred instructor
+
+    def is_preferred(self, section: Section) -> bool:
+        instructor = section.instructor.lower()
+        return any(
+            name.strip().lower() in instructor
+            for name in self.preferred_instructors
+            if name.strip()
+        )
+
+
+@dataclass(frozen=True)
+class RankedSchedule:
+    schedule: Schedule
+    cost: float
+    days: int
+    gap_minutes: int
+    early_meetings: int
+    non_preferred: int
+
+    @property
+    def sections(self) -> Tuple[Section, ...]:
+        return self.schedule.sections
+
+
+@dataclass
+class _Option:
+    """Sections of one course that meet at the same times and cost the same"""
+
+    bits: int
+    days: int
+    early: int
+    non_preferred: int
+    static_cost: float
+    sections: List[Section] = field(default_factory=list)
+
+
+class ScheduleRanker:
+    """Finds the k lowest-cost clash-free schedules with branch-and-bound.
+
+    Early starts and non-preferred instructors add a fixed cost per
+    section, so they are bounded by each remaining course's cheapest
+    option. Campus days can only grow, so at least the most demanding
+    remaining course's new days are added. A later class can fill or split
+    a gap, so only gaps that no remaining option overlaps are counted. A
+    branch is cut once its bound cannot beat the k-th best schedule found
+    so far.
+    """
+
+    def __init__(self, solver: ScheduleSolver, preferences: Optional[SchedulePreferences] = None):
+        self.solver = solver
+        self.preferences = preferences or SchedulePreferences()
+        self.slots_per_day = MINUTES_PER_DAY // solver.slot_minutes
+        self._day_mask = (1 << self.slots_per_day) - 1
+
+    def _options(self, course_codes: Sequence[str]) -> Dict[str, List[_Option]]:
+        prefs = self.preferences
+        options = {}
+        for code, groups in self.solver._candidates(course_codes).items():
+            by_cost: Dict[Tuple[int, bool], _Option] = {}
+            for bits, sections in groups:
+                for section in sections:
+                    preferred = not prefs.preferred_instructors or prefs.is_preferred(section)
+                    key = (bits, preferred)
+                    if key not in by_cost:
+                        meetings = bin(section.days).count("1") if section.is_scheduled else 0
+                        early = meetings if 0 <= section.start < prefs.early_start else 0
+                        non_preferred = 0 if preferred else 1
+                        by_cost[key] = _Option(
+                            bits=bits,
+                            days=section.days if section.is_scheduled else 0,
+                            early=early,
+                            non_preferred=non_preferred,
+                            static_cost=early * prefs.early_weight
+                            + non_preferred * prefs.instructor_weight,
+                        )
+                    by_cost[key].sections.append(section)
+            options[code] = sorted(by_cost.values(), key=lambda o: o.static_cost)
+        return options
+
+    def _holes(self, bits: int, days: int) -> int:
+        """Free slots between a day's first and last class, as a bitset"""
+        holes = 0
+        for day in range(len(DAY_LETTERS)):
+            if not days & (1 << day):
+                continue
+            shift = day * self.slots_per_day
+            day_bits = (bits >> shift) & self._day_mask
+            if day_bits:
+                low = day_bits & -day_bits
+                span = (1 << day_bits.bit_length()) - low
+                holes |= (span & ~day_bits) << shift
+        return holes
+
+    def _gap_minutes(self, holes: int, untouched_by: int = 0) -> int:
+        """Idle minutes in the holes beyond the passing time of each break,
+        leaving out breaks that overlap untouched_by"""
+        slot = self.solver.slot_minutes
+        passing = self.preferences.passing_minutes // slot
+        gap_slots = 0
+        while holes:
+            # Peel off the lowest run of free slots
+            run = holes & ~(holes + (holes & -holes))
+            if not run & untouched_by:
+                gap_slots += max(0, run.bit_count() - passing)
+            holes ^= run
+        return gap_slots * slot
+
+    def top(
+        self, course_codes: Sequence[str], k: int = 10, max_nodes: Optional[int] = None
+    ) -> List[RankedSchedule]:
+        """Return the k best clash-free schedules, cheapest first.
+
+        With max_nodes set the search stops after visiting that many
+        partial schedules and returns the best ones found so far.
+        """
+        prefs = self.preferences
+        options = self._options(course_codes)
+        if not options or k <= 0:
+            return []
+        order = list(options)
+        # Max-heap (by negated cost) of the k best schedules found so far
+        best: List[Tuple[float, int, RankedSchedule]] = []
+        counter = itertools.count()
+        chosen: Dict[str, _Option] = {}
+        nodes = 0
+
+        def worst() -> float:
+            return -best[0][0] if len(best) >= k else float("inf")
+
+        def leaf(used: int, days: int, static: float):
+            gap = self._gap_minutes(self._holes(used, days))
+            cost = static + days.bit_count() * prefs.day_weight + gap * prefs.gap_weight
+            if cost >= worst():
+                return
+            picked = [chosen[code] for code in order]
+            early = sum(option.early for option in picked)
+            non_preferred = sum(option.non_preferred for option in picked)
+            # Every expansion of this choice of options costs the same
+            for sections in itertools.product(*(option.sections for option in picked)):
+                if cost >= worst():
+                    return
+                ranked = RankedSchedule(
+                    Schedule(sections, used), cost, days.bit_count(), gap, early, non_preferred
+                )
+                entry = (-cost, next(counter), ranked)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+
+        def bound(remaining: Dict[str, List[_Option]], used: int, days: int, static: float) -> float:
+            extra_static = sum(opts[0].static_cost for opts in remaining.values())
+            new_days = max(
+                min((o.days & ~days).bit_count() for o in opts) for opts in remaining.values()
+            )
+            # A later class inside a hole can split it into breaks that each get
+            # passing time, so only holes no remaining option reaches are certain
+            reach = 0
+            for opts in remaining.values():
+                for o in opts:
+                    reach |= o.bits
+            gap = self._gap_minutes(self._holes(used, days), untouched_by=reach)
+            return (
+                static
+                + extra_static
+                + (days.bit_count() + new_days) * prefs.day_weight
+                + gap * prefs.gap_weight
+            )
+
+        def search(remaining: Dict[str, List[_Option]], used: int, days: int, static: float):
+            nonlocal nodes
+            nodes += 1
+            if max_nodes is not None and nodes > max_nodes:
+                return
+            if bound(remaining, used, days, static) >= worst():
+                return
+            code = min(remaining, key=lambda c: len(remaining[c]))
+            rest = {c: opts for c, opts in remaining.items() if c != code}
+            # Cheapest options first so good schedules tighten the bound early
+            for option in sorted(
+                remaining[code],
+                key=lambda o: o.static_cost + (o.days & ~days).bit_count() * prefs.day_weight,
+            ):
+                taken = used | option.bits
+                chosen[code] = option
+                if not rest:
+                    leaf(taken, days | option.days, static + option.static_cost)
+                    continue
+                narrowed = {}
+                for other, opts in rest.items():
+                    fitting = [o for o in opts if not o.bits & taken]
+                    if not fitting:
+                        break
+                    narrowed[other] = fitting
+                else:
+                    search(narrowed, taken, days | option.days, static + option.static_cost)
+            chosen.pop(code, None)
+
+        search(options, 0, 0, 0.0)
+        if max_nodes is not None and nodes > max_nodes:
+            logger.warning(f"Stopped ranking after {max_nodes} nodes; results may not be optimal")
+        ranked = [entry[2] for entry in sorted(best, key=lambda e: (-e[0], e[1]))]
+        logger.info(f"Ranked the {len(ranked)} best schedules for {len(order)} courses")
+        return ranked
@@ -0,0 +1,207 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import logging
+
+from pydantic import TypeAdapter, ValidationError
+
+from src.models import Course, CourseOfferings, section_key, standardize_field_name
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_courses_adapter = TypeAdapter(List[Course])
+
+
+def iter_json_values(text: str) -> Iterator[object]:
+    """Yield every top-level JSON object or array embedded in text.
+
+    Scans left to right once: at each "{" or "[" it tries to decode a value
+    in place and, on success, resumes after it. Text around the values
+    (prose, code fences) is skipped without any regex backtracking.
+    """
+    position = 0
+    length = len(text)
+    while position < length:
+        brace = text.find("{", position)
+        bracket = text.find("[", position)
+        if brace < 0 and bracket < 0:
+            return
+        start = bracket if brace < 0 or 0 <= bracket < brace else brace
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            position = start + 1
+            continue
+        yield value
+        position = end
+
+
+@lru_cache(maxsize=256)
+def _key_mapping(keys: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """(key, Course field) pairs for one record layout; records share layouts"""
+    mapping, fields = [], set()
+    for key in keys:
+        field = standardize_field_name(str(key))
+        if field and field not in fields:
+            fields.add(field)
+            mapping.append((key, field))
+    return tuple(mapping)
+
+
+def normalize_record(record: dict) -> Optional[dict]:
+    """Map loose keys onto Course fields; None if there is no course code"""
+    normalized = {}
+    for key, field in _key_mapping(tuple(record)):
+        value = record[key]
+        normalized[field] = "" if value is None else str(value)
+    if not normalized.get("course_code"):
+        return None
+    for field in Course.model_fields:
+        normalized.setdefault(field, "")
+    return normalized
+
+
+def validate_records(records: List[dict]) -> List[Course]:
+    """Validate loose course records in one batch, dropping any bad ones"""
+    try:
+        return _courses_adapter.validate_python(records)
+    except ValidationError:
+        courses = []
+        for record in records:
+            try:
+                courses.append(Course.model_validate(record))
+            except ValidationError:
+                continue
+        return courses
+
+
+def batch_keys(records: Iterable[dict]) -> Iterator[tuple]:
+    """section_key of each record of one batch, numbering repeats within it.
+
+    A batch is read losslessly (one table page, one agent message), so rows
+    that look alike there are distinct sections and must not merge; only the
+    nth copy of a key in one batch merges with the nth copy in another.
+    """
+    seen: Dict[tuple, int] = {}
+    for record in records:
+        key = section_key(record)
+        seen[key] = seen.get(key, -1) + 1
+        yield key + (seen[key],)
+
+
+class CourseMerger:
+    """Keeps the newest version of each section, keyed by batch_keys.
+
+    Agents resend everything collected so far after every page, so the same
+    rows arrive again and again; a dict keyed on the row's identity drops
+    the repeats in O(1) each while keeping first-seen order.
+    """
+
+    def __init__(self):
+        self.rows: Dict[tuple, dict] = {}
+        self.duplicates = 0
+
+    def add(self, records: List[dict]):
+        """Merge one batch of records"""
+        for key, record in zip(batch_keys(records), records):
+            if key in self.rows:
+                self.duplicates += 1
+            self.rows[key] = record
+
+    def records(self) -> List[dict]:
+        return list(self.rows.values())
+
+
+def dedupe_courses(*batches: List[Course]) -> List[Course]:
+    """Merge batches of courses, keeping the last version of each repeated
+    section; repeats inside one batch are kept"""
+    merged: Dict[tuple, Course] = {}
+    total = 0
+    for courses in batches:
+        total += len(courses)
+        for key, course in zip(batch_keys(course.model_dump() for course in courses), courses):
+            merged[key] = course
+    if len(merged) < total:
+        logger.info(f"Dropped {total - len(merged)} duplicate course rows")
+    return list(merged.values())
+
+
+class ResultRecovery:
+    """Recovers course data from a browser-use agent result in one pass.
+
+    A complete CourseOfferings object anywhere in the output wins and ends
+    the scan. Otherwise loose course records (arrays of course-like
+    objects, or single objects left over from truncated arrays) are
+    collected from every step, merged on their section identity and
+    validated together at the end.
+    """
+
+    def __init__(self):
+        self.merger = CourseMerger()
+
+    def feed(self, text: str) -> Optional[CourseOfferings]:
+        """Scan one chunk of text; return a complete CourseOfferings if found"""
+        for value in iter_json_values(text):
+            if isinstance(value, dict) and isinstance(value.get("courses"), list):
+                try:
+                    offerings = CourseOfferings.model_validate(value)
+                except ValidationError as e:
+                    logger.warning(f"Ignoring invalid CourseOfferings candidate: {e}")
+                    self._collect(value["courses"])
+                    continue
+                if offerings.courses:
+                    # One list is one batch, so there is nothing to merge
+                    return offerings
+            elif isinstance(value, list):
+                self._collect(value)
+            elif isinstance(value, dict):
+                self._collect([value])
+        return None
+
+    def _collect(self, items: list):
+        records = [normalize_record(item) for item in items if isinstance(item, dict)]
+        self.merger.add([record for record in records if record])
+
+    def result(self) -> Optional[CourseOfferings]:
+        if self.merger.duplicates:
+            logger.info(
+                f"Dropped {self.merger.duplicates} duplicate course rows "
+                f"resent across agent steps"
+            )
+        courses = validate_records(self.merger.records())
+        # Already validated, so skip a second pass over every course
+        return CourseOfferings.model_construct(courses=courses) if courses else None
+
+
+def step_texts(result) -> Iterator[str]:
+    """Yield the text of every place an agent result may carry course data"""
+    if hasattr(result, "final_result") and callable(getattr(result, "final_result")):
+        final_result = result.final_result()
+        if final_result:
+            yield final_result
+
+    if hasattr(result, "__iter__"):
+        for step in result:
+            action = getattr(step, "action", None)
+            if isinstance(action, dict) and "done" in action:
+                done_data = action.get("done", {})
+                if (
+                    isinstance(done_data, dict)
+                    and done_data.get("success")
+                    and "text" in done_data
+                ):
+                    yield str(done_data["text"])
+            response = getattr(step, "controller_response", None)
+            if response:
+                yield str(response)
+
+
+def recover_offerings(result) -> Optional[CourseOfferings]:
+    """Return the course offerings found in an agent result, or None"""
+    recovery = ResultRecovery()
+    for text in step_texts(result):
+        offerings = recovery.feed(text)
+        if offerings:
+            return offerings
+    return recovery.result()
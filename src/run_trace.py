@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import time
+import uuid
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.session_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_DIR = os.path.join(DEFAULT_CACHE_DIR, "traces")
+
+# Phases of an agent step; "browser" is whatever part of a step is neither
+# waiting on the LLM nor on a page load
+PHASES = ("llm", "navigation", "browser")
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Prompt and completion token counts from a LangChain LLMResult"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                }
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "input_tokens": usage.get("prompt_tokens", 0),
+        "output_tokens": usage.get("completion_tokens", 0),
+    }
+
+
+class _LLMTimer(BaseCallbackHandler):
+    """Times every chat model call and records its token counts"""
+
+    def __init__(self, tracer: "RunTracer"):
+        self.tracer = tracer
+        self.started: Dict[object, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        # The last message carries the serialized page the agent is looking at
+        last = messages[0][-1] if messages and messages[0] else None
+        content = getattr(last, "content", "") if last is not None else ""
+        self.started[run_id] = (self.tracer.now(), len(str(content)))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start, dom_chars = self.started.pop(run_id, (None, 0))
+        if start is not None:
+            self.tracer.record("llm", start, dom_chars=dom_chars, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start, _ = self.started.pop(run_id, (None, 0))
+        if start is not None:
+            self.tracer.record("llm", start, error=str(error))
+
+
+class RunTracer:
+    """Per-step timing trace of one agent run, streamed to a JSONL file.
+
+    Each line is one span: {"run", "phase", "step", "start", "end", ...}
+    with times in seconds since the run started. Steps come from the
+    agent's step hooks, LLM calls from a LangChain callback on the model
+    and navigation waits from the page's request and load events.
+    """
+
+    def __init__(self, name: str, trace_dir: str = DEFAULT_TRACE_DIR):
+        os.makedirs(trace_dir, exist_ok=True)
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(trace_dir, f"{self.run_id}.jsonl")
+        self.step = 0
+        self._origin = time.perf_counter()
+        self._step_start: Optional[float] = None
+        self._navigation_start: Optional[float] = None
+        self._pages = set()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __enter__(self) -> "RunTracer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def record(self, phase: str, start: float, end: Optional[float] = None, **attrs):
+        event = {
+            "run": self.run_id,
+            "phase": phase,
+            "step": self.step,
+            "start": round(start, 4),
+            "end": round(self.now() if end is None else end, 4),
+            **attrs,
+        }
+        if not self._file.closed:
+            self._file.write(json.dumps(event) + "\n")
+
+    def instrument(self, llm):
+        """Copy of a LangChain chat model that reports its calls to this trace"""
+        callbacks = list(llm.callbacks or []) + [_LLMTimer(self)]
+        return llm.model_copy(update={"callbacks": callbacks})
+
+    async def on_step_start(self, agent):
+        self.step += 1
+        self._step_start = self.now()
+        try:
+            page = await agent.browser_context.get_current_page()
+        except Exception as e:
+            logger.debug(f"No page to watch for navigation: {e}")
+            return
+        if id(page) not in self._pages:
+            self._pages.add(id(page))
+            page.on("request", lambda request: self._on_request(page, request))
+            page.on("load", lambda _: self._on_load())
+
+    async def on_step_end(self, agent):
+        if self._step_start is not None:
+            self.record("step", self._step_start)
+            self._step_start = None
+
+    def _on_request(self, page, request):
+        if request.is_navigation_request() and request.frame == page.main_frame:
+            self._navigation_start = self.now()
+
+    def _on_load(self):
+        if self._navigation_start is not None:
+            self.record("navigation", self._navigation_start)
+            self._navigation_start = None
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Run trace written to {self.path}")
+
+
+def list_traces(trace_dir: str = DEFAULT_TRACE_DIR) -> List[str]:
+    """Trace files, newest first"""
+    if not os.path.isdir(trace_dir):
+        return []
+    names = [name for name in os.listdir(trace_dir) if name.endswith(".jsonl")]
+    return [os.path.join(trace_dir, name) for name in sorted(names, reverse=True)]
+
+
+def load_trace(path: str) -> List[dict]:
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping a malformed line in {path}")
+    return events
+
+
+def summarize_steps(events: List[dict]) -> List[dict]:
+    """One row per step: wall time split into LLM, navigation and browser
+    time, plus token counts and the size of the page sent to the LLM"""
+    rows: Dict[int, dict] = {}
+
+    def row(step: int) -> dict:
+        return rows.setdefault(
+            step,
+            {
+                "step": step,
+                "start": None,
+                "total": 0.0,
+                "llm": 0.0,
+                "navigation": 0.0,
+                "browser": 0.0,
+                "llm_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "dom_chars": 0,
+            },
+        )
+
+    for event in events:
+        current = row(event["step"])
+        duration = event["end"] - event["start"]
+        if event["phase"] == "step":
+            current["start"] = event["start"]
+            current["total"] = duration
+        elif event["phase"] == "llm":
+            current["llm"] += duration
+            current["llm_calls"] += 1
+            current["input_tokens"] += event.get("input_tokens", 0)
+            current["output_tokens"] += event.get("output_tokens", 0)
+            current["dom_chars"] = max(current["dom_chars"], event.get("dom_chars", 0))
+        elif event["phase"] == "navigation":
+            current["navigation"] += duration
+
+    for current in rows.values():
+        current["browser"] = max(0.0, current["total"] - current["llm"] - current["navigation"])
+        for phase in ("total",) + PHASES:
+            current[phase] = round(current[phase], 3)
+    return [rows[step] for step in sorted(rows)]
@@ -0,0 +1,257 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import hashlib
+import json
+import logging
+import platform
+import random
+import shutil
+import subprocess
+import time
+import urllib.request
+
+from src.extractor import ExtractionError, OfferingsExtractor, ResultsSession
+from src.models import Course, section_key
+from src.result_recovery import batch_keys
+from src.sections import UNKNOWN, Section
+
+logger = logging.getLogger(__name__)
+
+
+def enrollment_fingerprint(course: Course) -> str:
+    """Hash of the fields a seat watcher cares about"""
+    counts = [course.max_enrollment.strip(), course.total_enrollment.strip()]
+    return hashlib.sha256(json.dumps(counts).encode()).hexdigest()[:16]
+
+
+def seats_left(course: Optional[Course]) -> int:
+    return Section.from_course(course).seats_left if course else UNKNOWN
+
+
+@dataclass
+class SeatChange:
+    """Enrollment of a watched section changed; previous is None for a
+    section that only appeared after watching started"""
+
+    course: Course
+    previous: Optional[Course]
+    at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> str:
+        return "|".join(section_key(self.course.model_dump()))
+
+    @property
+    def seats_left(self) -> int:
+        return seats_left(self.course)
+
+    @property
+    def opened(self) -> bool:
+        """A seat is free now and was not before"""
+        return self.seats_left > 0 and (self.previous is None or seats_left(self.previous) <= 0)
+
+    def describe(self) -> str:
+        course = self.course
+        what = f"{course.course_code} {course.days} {course.start_time} ({course.instructor})"
+        now = f"{course.total_enrollment}/{course.max_enrollment}"
+        if self.previous is None:
+            return f"New section {what}: {now} enrolled"
+        before = f"{self.previous.total_enrollment}/{self.previous.max_enrollment}"
+        prefix = "Seat open" if self.opened else "Enrollment changed"
+        return f"{prefix} in {what}: {before} -> {now} enrolled"
+
+    def to_dict(self) -> dict:
+        return {
+            "key": self.key,
+            "opened": self.opened,
+            "seats_left": self.seats_left,
+            "course": self.course.model_dump(),
+            "previous": self.previous.model_dump() if self.previous else None,
+            "at": self.at,
+            "message": self.describe(),
+        }
+
+
+# Called from a worker thread for every change, so it may block
+Notifier = Callable[[SeatChange], None]
+
+
+def log_notifier(change: SeatChange):
+    logger.info(change.describe())
+
+
+def desktop_notifier(change: SeatChange):
+    """Pop up a local desktop notification where the OS offers a command"""
+    title, message = "Schedule Finder", change.describe()
+    if platform.system() == "Darwin" and shutil.which("osascript"):
+        script = f"display notification {json.dumps(message)} with title {json.dumps(title)}"
+        subprocess.run(["osascript", "-e", script], check=False)
+    elif shutil.which("notify-send"):
+        subprocess.run(["notify-send", title, message], check=False)
+    else:
+        logger.info(f"No desktop notifier available: {message}")
+
+
+class WebhookNotifier:
+    """POSTs every change as JSON to a URL (Slack-style incoming webhooks,
+    a local listener...)"""
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, change: SeatChange):
+        body = json.dumps(dict(change.to_dict(), text=change.describe())).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SeatWatcher:
+    """Polls the watched course codes' sections and reports enrollment changes.
+
+    One browser stays logged in for the whole watch. The first poll reads
+    every results page, and later polls only re-read the pages that held a
+    watched section, with a full read every full_read_every polls or as
+    soon as the sections move. Each section's enrollment is fingerprinted,
+    and a SeatChange goes to the notifiers only when the fingerprint changes
+    (or, with only_openings, when a seat frees up). Polls are spaced by
+    interval_seconds with +/- jitter, and failures back off exponentially
+    up to max_backoff_seconds, logging in again on the next poll.
+    """
+
+    def __init__(
+        self,
+        extractor: OfferingsExtractor,
+        course_codes: Iterable[str],
+        notifiers: Iterable[Notifier] = (log_notifier,),
+        interval_seconds: float = 60,
+        jitter: float = 0.2,
+        max_backoff_seconds: float = 900,
+        only_openings: bool = False,
+        full_read_every: int = 10,
+    ):
+        self.extractor = extractor
+        self.course_codes: Set[str] = {
+            code.strip().upper() for code in course_codes if code.strip()
+        }
+        if not self.course_codes:
+            raise ValueError("The watchlist is empty")
+        self.notifiers = list(notifiers)
+        self.interval_seconds = interval_seconds
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.max_backoff_seconds = max_backoff_seconds
+        self.only_openings = only_openings
+        self.full_read_every = max(1, full_read_every)
+        self.fingerprints: Dict[tuple, str] = {}
+        self.sections: Dict[tuple, Course] = {}
+        self.polls = 0
+        # Results pages holding watched sections; None until a full read
+        self._pages: Optional[Set[int]] = None
+
+    def watched(self, course: Course) -> bool:
+        return course.course_code.strip().upper() in self.course_codes
+
+    async def poll(self, session: ResultsSession) -> List[SeatChange]:
+        """Read the watched sections once and return what changed"""
+        if self.polls % self.full_read_every == 0:
+            # Sections added on pages that are not being re-read show up here
+            self._pages = None
+        try:
+            pages = await session.read_pages(self._pages)
+        except ExtractionError as e:
+            if self._pages is None:
+                raise
+            logger.info(f"Watched pages moved ({e}), reading every page")
+            self._pages = None
+            pages = await session.read_pages()
+
+        full = self._pages is None
+        watched = [
+            (number, course)
+            for number, extracted in sorted(pages.items())
+            for course in extracted.courses or []
+            if self.watched(course)
+        ]
+        # Alike sections are told apart by their order, which polls keep
+        keys = batch_keys(course.model_dump() for _, course in watched)
+        current: Dict[tuple, Course] = {}
+        found_on = set()
+        for key, (number, course) in zip(keys, watched):
+            current[key] = course
+            found_on.add(number)
+        missing = set(self.sections) - set(current)
+        if full:
+            for key in missing:
+                logger.info(f"Section {' '.join(filter(None, key[:-1]))} is no longer listed")
+                self.sections.pop(key)
+                self.fingerprints.pop(key)
+            self._pages = found_on or None
+        elif missing:
+            # A watched section was not on its page any more
+            logger.info("Watched sections moved, reading every page next poll")
+            self._pages = None
+        else:
+            self._pages = found_on
+
+        changes = []
+        for key, course in current.items():
+            fingerprint = enrollment_fingerprint(course)
+            known = key in self.fingerprints
+            if known and self.fingerprints[key] == fingerprint:
+                continue
+            if known or self.polls:
+                change = SeatChange(course, self.sections.get(key))
+                if change.opened or not self.only_openings:
+                    changes.append(change)
+            self.fingerprints[key] = fingerprint
+            self.sections[key] = course
+        if not self.polls:
+            logger.info(
+                f"Watching {len(current)} sections of {', '.join(sorted(self.course_codes))} "
+                f"on {len(found_on)} results pages"
+            )
+        self.polls += 1
+        return changes
+
+    async def notify(self, changes: List[SeatChange]):
+        for change in changes:
+            for notifier in self.notifiers:
+                try:
+                    await asyncio.to_thread(notifier, change)
+                except Exception as e:
+                    logger.warning(f"Notifier {notifier!r} failed: {e}")
+
+    def _delay(self, failures: int) -> float:
+        base = self.interval_seconds
+        if failures:
+            base = min(self.max_backoff_seconds, base * 2**failures)
+        return max(1.0, base * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def run(self, max_polls: Optional[int] = None):
+        """Poll until cancelled, or for max_polls polls"""
+        failures = 0
+        done = 0
+        while max_polls is None or done < max_polls:
+            try:
+                async with self.extractor.open_results() as session:
+                    while max_polls is None or done < max_polls:
+                        changes = await self.poll(session)
+                        done += 1
+                        failures = 0
+                        await self.notify(changes)
+                        if max_polls is None or done < max_polls:
+                            await asyncio.sleep(self._delay(0))
+            except Exception as e:
+                if isinstance(e, ExtractionError) and not self.polls:
+                    # Never got through once: bad credentials or selectors
+                    raise
+                done += 1
+                failures += 1
+                delay = self._delay(failures)
+                logger.warning(f"Poll failed ({e}); logging in again in {delay:.0f}s")
+                if max_polls is None or done < max_polls:
+                    await asyncio.sleep(delay)
@@ -0,0 +1,251 @@
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List
+import re
+
+import polars as pl
+
+from src.models import Course, CourseOfferings
+
+# Bit position of each weekday in a day mask, Monday first
+DAY_BITS = {"M": 0, "T": 1, "W": 2, "R": 3, "F": 4, "S": 5, "U": 6}
+DAY_LETTERS = "MTWRFSU"
+
+# Longest tokens first so "TH" is Thursday rather than Tuesday + "H"
+_DAY_TOKENS = {
+    "MONDAY": "M", "TUESDAY": "T", "WEDNESDAY": "W", "THURSDAY": "R",
+    "FRIDAY": "F", "SATURDAY": "S", "SUNDAY": "U",
+    "TUES": "T", "THURS": "R", "THUR": "R",
+    "MON": "M", "TUE": "T", "WED": "W", "THU": "R", "FRI": "F", "SAT": "S", "SUN": "U",
+    "TU": "T", "TH": "R", "SA": "S", "SU": "U",
+    "M": "M", "T": "T", "W": "W", "R": "R", "F": "F", "S": "S", "U": "U",
+}
+_DAY_RE = re.compile("|".join(sorted(_DAY_TOKENS, key=len, reverse=True)))
+_INT_RE = re.compile(r"\d+")
+_TIME_RE = re.compile(r"(\d{1,2})(?:[:.]?(\d{2}))?\s*([AP])?\.?M?\.?", re.IGNORECASE)
+
+MINUTES_PER_DAY = 24 * 60
+
+# Sentinel for missing or unparseable numeric fields
+UNKNOWN = -1
+
+
+# The parsers are memoized: a handful of day, time and count strings repeat
+# across every row of a results set
+
+
+@lru_cache(maxsize=4096)
+def parse_days(value: str) -> int:
+    """Parse a days string such as "MW", "TTh" or "Mon/Wed" into a 7-bit mask.
+
+    Anything that is not made up of day names, such as "TBA", gives 0.
+    """
+    letters = re.sub(r"[^A-Z]", "", (value or "").upper())
+    tokens = _DAY_RE.findall(letters)
+    if "".join(tokens) != letters:
+        return 0
+    mask = 0
+    for token in tokens:
+        mask |= 1 << DAY_BITS[_DAY_TOKENS[token]]
+    return mask
+
+
+def letters_mask(letters: Iterable[str]) -> int:
+    """Day mask of single day letters such as a multiselect's picks.
+
+    Joining them and using parse_days would read "S" + "U" as "SU", Sunday.
+    """
+    mask = 0
+    for letter in letters:
+        mask |= 1 << DAY_BITS[letter]
+    return mask
+
+
+def format_days(mask: int) -> str:
+    return "".join(letter for bit, letter in enumerate(DAY_LETTERS) if mask & (1 << bit))
+
+
+@lru_cache(maxsize=4096)
+def parse_time(value: str) -> int:
+    """Parse "10:00 AM", "1:30pm" or "13:30" into minutes since midnight"""
+    match = _TIME_RE.search((value or "").strip())
+    if not match:
+        return UNKNOWN
+    hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").upper()
+    if meridiem == "P" and hours < 12:
+        hours += 12
+    elif meridiem == "A" and hours == 12:
+        hours = 0
+    if hours > 23 or minutes > 59:
+        return UNKNOWN
+    return hours * 60 + minutes
+
+
+def format_time(minutes: int) -> str:
+    if minutes < 0:
+        return ""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@lru_cache(maxsize=4096)
+def parse_int(value: str) -> int:
+    """Parse the leading integer of a field such as "3" or "3.0 cr" """
+    match = _INT_RE.search(value or "")
+    return int(match.group(0)) if match else UNKNOWN
+
+
+@dataclass(frozen=True, slots=True)
+class Section:
+    """A course row with its schedule and counts parsed into integers"""
+
+    course_code: str
+    course_name: str
+    instructor: str
+    room: str
+    credits: int
+    days: int
+    start: int
+    end: int
+    max_enrollment: int
+    total_enrollment: int
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Section":
+        """Parse a mapping of Course field names to raw strings"""
+
+        def text(name):
+            value = record.get(name)
+            return "" if value is None else str(value).strip()
+
+        return cls(
+            course_code=text("course_code"),
+            course_name=text("course_name"),
+            instructor=text("instructor"),
+            room=text("room"),
+            credits=parse_int(text("credits")),
+            days=parse_days(text("days")),
+            start=parse_time(text("start_time")),
+            end=parse_time(text("end_time")),
+            max_enrollment=parse_int(text("max_enrollment")),
+            total_enrollment=parse_int(text("total_enrollment")),
+        )
+
+    @classmethod
+    def from_course(cls, course: Course) -> "Section":
+        return cls.from_record(vars(course))
+
+    @property
+    def seats_left(self) -> int:
+        if self.max_enrollment < 0 or self.total_enrollment < 0:
+            return UNKNOWN
+        return self.max_enrollment - self.total_enrollment
+
+    @property
+    def is_scheduled(self) -> bool:
+        return self.days != 0 and 0 <= self.start < self.end
+
+    def overlaps(self, other: "Section") -> bool:
+        return (
+            self.is_scheduled
+            and other.is_scheduled
+            and bool(self.days & other.days)
+            and self.start < other.end
+            and other.start < self.end
+        )
+
+
+class SectionTable:
+    """Column-oriented, array-backed collection of parsed sections.
+
+    Numeric columns live in typed ``array`` buffers, so filters and
+    conflict checks over large result sets are plain integer comparisons.
+    """
+
+    __slots__ = (
+        "course_code",
+        "course_name",
+        "instructor",
+        "room",
+        "credits",
+        "days",
+        "start",
+        "end",
+        "max_enrollment",
+        "total_enrollment",
+    )
+
+    def __init__(self):
+        self.course_code: List[str] = []
+        self.course_name: List[str] = []
+        self.instructor: List[str] = []
+        self.room: List[str] = []
+        self.credits = array("h")
+        self.days = array("b")
+        self.start = array("h")
+        self.end = array("h")
+        self.max_enrollment = array("i")
+        self.total_enrollment = array("i")
+
+    @classmethod
+    def from_courses(cls, courses: Iterable[Course]) -> "SectionTable":
+        table = cls()
+        for course in courses:
+            table.append(Section.from_course(course))
+        return table
+
+    @classmethod
+    def from_offerings(cls, offerings: CourseOfferings) -> "SectionTable":
+        return cls.from_courses(offerings.courses)
+
+    @classmethod
+    def from_frame(cls, df: pl.DataFrame) -> "SectionTable":
+        """Build from a DataFrame with the (string) Course columns"""
+        table = cls()
+        for row in df.iter_rows(named=True):
+            table.append(Section.from_record(row))
+        return table
+
+    def append(self, section: Section):
+        for name in self.__slots__:
+            getattr(self, name).append(getattr(section, name))
+
+    def __len__(self) -> int:
+        return len(self.course_code)
+
+    def __getitem__(self, index: int) -> Section:
+        return Section(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def conflicts(self, i: int, j: int) -> bool:
+        """Whether sections i and j meet at the same time on a shared day"""
+        return (
+            bool(self.days[i] & self.days[j])
+            and 0 <= self.start[i] < self.end[i]
+            and 0 <= self.start[j] < self.end[j]
+            and self.start[i] < self.end[j]
+            and self.start[j] < self.end[i]
+        )
+
+    def meeting_on(self, days: int) -> List[int]:
+        """Row ids of sections that meet on any of the given days"""
+        return [index for index, mask in enumerate(self.days) if mask & days]
+
+    def to_polars(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "course_code": self.course_code,
+                "course_name": self.course_name,
+                "instructor": self.instructor,
+                "room": self.room,
+                "credits": pl.Series(self.credits.tolist(), dtype=pl.Int16),
+                "days": pl.Series(self.days.tolist(), dtype=pl.Int8),
+                "start": pl.Series(self.start.tolist(), dtype=pl.Int16),
+                "end": pl.Series(self.end.tolist(), dtype=pl.Int16),
+                "max_enrollment": pl.Series(self.max_enrollment.tolist(), dtype=pl.Int32),
+                "total_enrollment": pl.Series(self.total_enrollment.tolist(), dtype=pl.Int32),
+            }
+        )
@@ -0,0 +1,165 @@
+from typing import Optional
+import hashlib
+import json
+import logging
+import os
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "schedule-finder")
+PORTAL_HOME_URL = "https://cudportal.cud.ac.ae/student/index.asp"
+
+
+class SessionCache:
+    """Encrypted on-disk cache of Playwright storage states, keyed by username"""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl_seconds: int = 3600,
+        key: Optional[bytes] = None,
+    ):
+        self.cache_dir = os.path.join(cache_dir, "sessions")
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        self._fernet = Fernet(key or self._load_key(cache_dir))
+
+    @staticmethod
+    def _load_key(cache_dir: str) -> bytes:
+        # SESSION_CACHE_KEY lets deployments keep the key out of the cache dir
+        env_key = os.getenv("SESSION_CACHE_KEY")
+        if env_key:
+            return env_key.encode()
+
+        key_path = os.path.join(cache_dir, "session.key")
+        if os.path.exists(key_path):
+            with open(key_path, "rb") as f:
+                return f.read()
+
+        key = Fernet.generate_key()
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def _path(self, username: str) -> str:
+        digest = hashlib.sha256(username.strip().lower().encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest[:32]}.session")
+
+    def load(self, username: str) -> Optional[dict]:
+        """Return the cached storage state, or None if missing or expired"""
+        path = self._path(username)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                # Fernet tokens carry their creation time, so decrypt enforces the TTL
+                payload = self._fernet.decrypt(f.read(), ttl=self.ttl_seconds)
+        except InvalidToken:
+            logger.info("Cached session expired or unreadable, discarding it")
+            self.invalidate(username)
+            return None
+
+        state = json.loads(payload)
+        now = time.time()
+        for cookie in state.get("cookies", []):
+            # Session cookies have expires == -1
+            expires = cookie.get("expires", -1)
+            if 0 < expires < now:
+                logger.info(f"Cached cookie {cookie.get('name')} expired, discarding session")
+                self.invalidate(username)
+                return None
+        return state
+
+    def save(self, username: str, storage_state: dict):
+        token = self._fernet.encrypt(json.dumps(storage_state).encode())
+        path = self._path(username)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, username: str):
+        path = self._path(username)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def probe_session(context, home_url: str = PORTAL_HOME_URL) -> bool:
+    """Cheap check that a Playwright context is still logged in.
+
+    Issues a single HTTP request with the context's cookies instead of
+    rendering a page; a session is valid if the portal does not bounce the
+    request back to its login form.
+    """
+    try:
+        response = await context.request.get(home_url)
+    except Exception as e:
+        logger.warning(f"Session probe failed: {e}")
+        return False
+    if not response.ok or "login" in response.url.lower():
+        return False
+    body = (await response.text()).lower()
+    return 'type="password"' not in body and "type='password'" not in body
+
+
+async def restore_session(context, username: str, cache: SessionCache):
+    """Load the cached session into an existing browser-use context"""
+    if await apply_storage_state(context, cache.load(username)):
+        logger.info("Restored cached portal session")
+
+
+# Seeds each origin's saved localStorage on its pages; keys the page has set
+# since are left alone, as the script runs again on every navigation
+_LOCAL_STORAGE_JS = """
+(() => {
+  const origins = %s;
+  const items = origins[location.origin];
+  if (!items) return;
+  try {
+    for (const {name, value} of items) {
+      if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+  } catch (e) {}
+})();
+"""
+
+
+async def apply_storage_state(context, state: Optional[dict]) -> bool:
+    """Add a Playwright storage state's cookies and localStorage to a
+    browser-use context.
+
+    browser-use creates its Playwright context itself, so storage_state= cannot
+    be passed in; the cookies are added and localStorage is seeded by an init
+    script instead.
+    """
+    if not state:
+        return False
+    cookies = state.get("cookies") or []
+    origins = {
+        origin["origin"]: origin.get("localStorage") or []
+        for origin in state.get("origins") or []
+        if origin.get("localStorage")
+    }
+    if not cookies and not origins:
+        return False
+    session = await context.get_session()
+    if cookies:
+        await session.context.add_cookies(cookies)
+    if origins:
+        await session.context.add_init_script(_LOCAL_STORAGE_JS % json.dumps(origins))
+    return True
+
+
+async def save_agent_context(context, username: str, cache: SessionCache):
+    """Persist the storage state of a browser-use context after a run"""
+    try:
+        session = await context.get_session()
+        cache.save(username, await session.context.storage_state())
+    except Exception as e:
+        logger.warning(f"Could not cache portal session: {e}")
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import itertools
+import logging
+import math
+
+from src.models import CourseOfferings
+from src.sections import (
+    DAY_LETTERS,
+    MINUTES_PER_DAY,
+    Section,
+    SectionTable,
+    format_days,
+    format_time,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def occupancy(section: Section, slot_minutes: int = 5) -> int:
+    """Encode the weekly time a section takes up as a bitset.
+
+    Each day is split into slots of slot_minutes, and bit
+    ``day * slots_per_day + slot`` is set for every slot the section meets
+    in. Unscheduled sections (no days or times) occupy nothing.
+    """
+    if not section.is_scheduled:
+        return 0
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    first = section.start // slot_minutes
+    last = -(-section.end // slot_minutes)  # ceil, so a partial slot still counts
+    day_bits = ((1 << (last - first)) - 1) << first
+    bits = 0
+    for day in range(len(DAY_LETTERS)):
+        if section.days & (1 << day):
+            bits |= day_bits << (day * slots_per_day)
+    return bits
+
+
+def normalize_code(code: str) -> str:
+    return "".join(code.split()).upper()
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """One clash-free choice of a section for every wanted course"""
+
+    sections: Tuple[Section, ...]
+    occupancy: int
+
+    @property
+    def credits(self) -> int:
+        return sum(max(section.credits, 0) for section in self.sections)
+
+    def to_records(self) -> List[dict]:
+        """Rows with Course field names and readable days and times"""
+        return [
+            {
+                "course_code": section.course_code,
+                "course_name": section.course_name,
+                "instructor": section.instructor,
+                "room": section.room,
+                "days": format_days(section.days),
+                "start_time": format_time(section.start),
+                "end_time": format_time(section.end),
+            }
+            for section in self.sections
+        ]
+
+
+class ScheduleSolver:
+    """Enumerates every combination of sections with no time conflicts.
+
+    Sections are grouped by course code and their weekly occupancy is
+    precomputed as an integer bitset, so a clash check is a single AND.
+    Sections of a course that meet at exactly the same times share one
+    bitset and are searched once. The search is a backtracking walk that
+    always branches on the course with the fewest time options still
+    compatible with the partial schedule, and backs out as soon as any
+    remaining course has none left.
+    """
+
+    def __init__(self, sections: Iterable[Section], slot_minutes: int = 5):
+        if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+            raise ValueError(f"slot_minutes must divide a day evenly: {slot_minutes}")
+        self.slot_minutes = slot_minutes
+        # course code -> occupancy bitset -> sections meeting at those times
+        self.by_code: Dict[str, Dict[int, List[Section]]] = {}
+        for section in sections:
+            slots = self.by_code.setdefault(normalize_code(section.course_code), {})
+            slots.setdefault(occupancy(section, slot_minutes), []).append(section)
+
+    @classmethod
+    def from_offerings(cls, offerings: CourseOfferings, **kwargs) -> "ScheduleSolver":
+        return cls(SectionTable.from_offerings(offerings), **kwargs)
+
+    @property
+    def course_codes(self) -> List[str]:
+        return sorted(self.by_code)
+
+    def _candidates(self, course_codes: Sequence[str]) -> Dict[str, List[Tuple[int, List[Section]]]]:
+        candidates = {}
+        for code in dict.fromkeys(normalize_code(code) for code in course_codes):
+            if code not in self.by_code:
+                raise ValueError(f"No sections found for course {code}")
+            candidates[code] = list(self.by_code[code].items())
+        return candidates
+
+    def iter_time_patterns(
+        self, course_codes: Sequence[str]
+    ) -> Iterator[Tuple[int, Dict[str, List[Section]]]]:
+        """Yield each clash-free combination of meeting times.
+
+        Every item is the combined occupancy and, per course code, the
+        interchangeable sections that meet at the chosen times.
+        """
+        candidates = self._candidates(course_codes)
+        if not candidates:
+            return
+        chosen: Dict[str, List[Section]] = {}
+
+        def search(remaining: Dict[str, List[Tuple[int, List[Section]]]], used: int):
+            if not remaining:
+                yield used, dict(chosen)
+                return
+            # Most constrained course first: fewest time options that still fit
+            code = min(remaining, key=lambda c: len(remaining[c]))
+            rest = {c: options for c, options in remaining.items() if c != code}
+            for bits, sections in remaining[code]:
+                taken = used | bits
+                narrowed = {}
+                for other, options in rest.items():
+                    fitting = [option for option in options if not option[0] & taken]
+                    if not fitting:
+                        break
+                    narrowed[other] = fitting
+                else:
+                    chosen[code] = sections
+                    yield from search(narrowed, taken)
+                    del chosen[code]
+
+        yield from search(candidates, 0)
+
+    def iter_schedules(self, course_codes: Sequence[str]) -> Iterator[Schedule]:
+        """Yield every clash-free schedule for the given course codes"""
+        order = list(dict.fromkeys(normalize_code(code) for code in course_codes))
+        for used, chosen in self.iter_time_patterns(order):
+            for sections in itertools.product(*(chosen[code] for code in order)):
+                yield Schedule(sections, used)
+
+    def count(self, course_codes: Sequence[str]) -> int:
+        """Number of clash-free schedules, without building them"""
+        return sum(
+            math.prod(len(sections) for sections in chosen.values())
+            for _, chosen in self.iter_time_patterns(course_codes)
+        )
+
+    def solve(self, course_codes: Sequence[str], limit: Optional[int] = None) -> List[Schedule]:
+        """Return up to limit clash-free schedules (all of them by default)"""
+        schedules = []
+        for schedule in self.iter_schedules(course_codes):
+            schedules.append(schedule)
+            if limit is not None and len(schedules) >= limit:
+                break
+        logger.info(f"Found {len(schedules)} clash-free schedules for {len(course_codes)} courses")
+        return schedules
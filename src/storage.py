@@ -0,0 +1,122 @@
+from typing import BinaryIO, Iterable, List, Optional, Union
+import logging
+import os
+
+from openpyxl import Workbook
+import polars as pl
+
+from src.models import Course, CourseOfferings
+from src.sections import SectionTable
+
+logger = logging.getLogger(__name__)
+
+# Arrow IPC is the primary results format: typed columns, and a file whose
+# buffers are read back as they are instead of parsed. CSV and Excel are
+# exports.
+DEFAULT_RESULTS_PATH = "course_offerings.arrow"
+
+COURSE_COLUMNS = list(Course.model_fields)
+
+# Typed columns stored next to the Course text, parsed once at write time
+TYPED_COLUMNS = {
+    "credits_value": ("credits", pl.Int16),
+    "day_mask": ("days", pl.Int8),
+    "start_minute": ("start", pl.Int16),
+    "end_minute": ("end", pl.Int16),
+    "max_enrollment_value": ("max_enrollment", pl.Int32),
+    "total_enrollment_value": ("total_enrollment", pl.Int32),
+}
+
+
+def offerings_frame(courses: Iterable[Course]) -> pl.DataFrame:
+    """Course text columns plus their parsed, typed counterparts"""
+    courses = list(courses)
+    table = SectionTable.from_courses(courses)
+    columns = {
+        name: pl.Series(name, [getattr(course, name) for course in courses], dtype=pl.String)
+        for name in COURSE_COLUMNS
+    }
+    for name, (attribute, dtype) in TYPED_COLUMNS.items():
+        columns[name] = pl.Series(name, getattr(table, attribute).tolist(), dtype=dtype)
+    return pl.DataFrame(columns)
+
+
+def with_typed_columns(df: pl.DataFrame) -> pl.DataFrame:
+    """Add the typed columns to a frame that only has the Course text columns"""
+    if all(name in df.columns for name in TYPED_COLUMNS):
+        return df
+    text = df.select(
+        pl.col(name).cast(pl.String).fill_null("") if name in df.columns else pl.lit("").alias(name)
+        for name in COURSE_COLUMNS
+    )
+    return offerings_frame(Course(**row) for row in text.iter_rows(named=True))
+
+
+def section_table(df: pl.DataFrame) -> SectionTable:
+    """SectionTable straight from the typed columns, without re-parsing text"""
+    df = with_typed_columns(df)
+    table = SectionTable()
+    for name in ("course_code", "course_name", "instructor", "room"):
+        setattr(table, name, df[name].to_list())
+    for name, (attribute, _) in TYPED_COLUMNS.items():
+        getattr(table, attribute).extend(df[name].to_list())
+    return table
+
+
+def frame_to_offerings(df: pl.DataFrame) -> CourseOfferings:
+    return CourseOfferings(
+        courses=[Course(**row) for row in df.select(COURSE_COLUMNS).iter_rows(named=True)]
+    )
+
+
+def write_results(df: pl.DataFrame, path: str = DEFAULT_RESULTS_PATH):
+    """Atomically write a results frame as uncompressed Arrow IPC"""
+    tmp_path = f"{path}.tmp"
+    # Uncompressed buffers load without a decompression pass
+    with_typed_columns(df).write_ipc(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def save_offerings(offerings: CourseOfferings, path: str = DEFAULT_RESULTS_PATH):
+    write_results(offerings_frame(offerings.courses), path)
+
+
+def load_results(path: str = DEFAULT_RESULTS_PATH) -> Optional[pl.DataFrame]:
+    """Read a whole results file into memory; None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    return pl.read_ipc(path)
+
+
+def scan_results(path: str = DEFAULT_RESULTS_PATH) -> pl.LazyFrame:
+    """Lazily scan a results file so filters are pushed down into the read"""
+    return pl.scan_ipc(path)
+
+
+def export_csv(df: pl.DataFrame, path: str):
+    df.select(COURSE_COLUMNS).write_csv(path)
+
+
+def export_excel(df: pl.DataFrame, target: Union[str, BinaryIO]):
+    """Write the Course columns as a single-sheet workbook to a path or buffer"""
+    # Write-only mode streams rows out instead of building a cell grid
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(COURSE_COLUMNS)
+    for row in df.select(COURSE_COLUMNS).iter_rows():
+        sheet.append(row)
+    workbook.save(target)
+
+
+class ResultsWriter:
+    """Keeps the results file current while batches stream in"""
+
+    def __init__(self, path: str = DEFAULT_RESULTS_PATH):
+        self.path = path
+        self.frames: List[pl.DataFrame] = []
+
+    def append(self, courses: List[Course]) -> pl.DataFrame:
+        """Add a batch, rewrite the file, and return everything so far"""
+        self.frames = [pl.concat(self.frames + [offerings_frame(courses)])]
+        write_results(self.frames[0], self.path)
+        return self.frames[0]
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional
+import logging
+
+from browser_use import ActionResult, Controller
+from browser_use.browser.context import BrowserContext
+from pydantic import BaseModel
+
+from src.extractor import (
+    TABLES_JS,
+    ExtractionError,
+    fingerprint_rows,
+    map_header,
+    parse_offerings_table,
+    pick_offerings_table,
+)
+from src.models import Course
+from src.result_recovery import dedupe_courses
+
+logger = logging.getLogger(__name__)
+
+READ_TABLE_ACTION = "read_offerings_table"
+
+# Sample rows shown to the LLM so it can check the column mapping
+SAMPLE_ROWS = 2
+
+
+class ColumnMapping(BaseModel):
+    header: str
+    field: str
+
+
+class ReadTableParams(BaseModel):
+    # Only set to correct a wrong mapping; by default it is inferred from
+    # the header labels
+    column_mapping: Optional[List[ColumnMapping]] = None
+
+
+def table_tsv(rows: List[List[str]], limit: int) -> str:
+    """Header plus the first limit rows as tab-separated lines"""
+    return "\n".join(
+        "\t".join(" ".join(cell.split()) for cell in row) for row in rows[: limit + 1]
+    )
+
+
+class TableCollector:
+    """Courses read by the table action, one entry per distinct table page"""
+
+    def __init__(self):
+        self.pages: Dict[str, List[Course]] = {}
+
+    def clear(self):
+        self.pages.clear()
+
+    def add(self, fingerprint: str, courses: List[Course]):
+        self.pages[fingerprint] = courses
+
+    def courses(self) -> List[Course]:
+        return dedupe_courses(*self.pages.values())
+
+
+def _override_mapping(header: List[str], overrides: List[ColumnMapping]) -> Dict[int, str]:
+    mapping = map_header(header)
+    labels = [" ".join(label.split()).lower() for label in header]
+    for override in overrides:
+        if override.field not in Course.model_fields:
+            raise ExtractionError(f"Unknown course field: {override.field}")
+        label = " ".join(override.header.split()).lower()
+        if label not in labels:
+            raise ExtractionError(f"No column labelled {override.header!r}")
+        index = labels.index(label)
+        mapping = {i: f for i, f in mapping.items() if f != override.field}
+        mapping[index] = override.field
+    return mapping
+
+
+def _pick_by_override(
+    tables: List[List[List[str]]], overrides: List[ColumnMapping]
+) -> List[List[str]]:
+    """The table holding the most overridden headers, largest first on ties.
+
+    Used instead of pick_offerings_table when the LLM corrects the mapping,
+    since the headers it corrects are the ones pick_offerings_table could not
+    recognise.
+    """
+    wanted = {" ".join(override.header.split()).lower() for override in overrides}
+
+    def score(rows: List[List[str]]):
+        labels = {" ".join(label.split()).lower() for label in rows[0]}
+        return len(wanted & labels), len(rows)
+
+    candidates = [rows for rows in tables if rows]
+    best = max(candidates, key=score, default=None)
+    if best is None or not score(best)[0]:
+        raise ExtractionError("No table has any of the column_mapping headers")
+    return best
+
+
+def register_table_action(controller: Controller, collector: TableCollector):
+    """Add an action that reads the offerings table without the LLM copying it.
+
+    The page's tables are serialized in the browser, the offerings table is
+    picked and parsed locally, and its rows go to collector. The LLM only
+    gets the header, a couple of sample rows and the inferred column
+    mapping back, so a results page costs a few hundred tokens no matter
+    how many rows it has.
+    """
+
+    @controller.action(
+        "Read every row of the course offerings table on the current page. "
+        "Rows are stored automatically: never copy them into your answer. "
+        "Check the reported column mapping; only if it is wrong, call again "
+        "with column_mapping listing the header and the correct course field.",
+        param_model=ReadTableParams,
+    )
+    async def read_offerings_table(params: ReadTableParams, browser: BrowserContext):
+        page = await browser.get_current_page()
+        try:
+            tables = await page.evaluate(TABLES_JS)
+            if params.column_mapping:
+                rows = _pick_by_override(tables, params.column_mapping)
+                mapping = _override_mapping(rows[0], params.column_mapping)
+            else:
+                try:
+                    rows = pick_offerings_table(tables)
+                except ExtractionError as e:
+                    # Give the LLM the headers it needs to write column_mapping
+                    largest = sorted((table for table in tables if table), key=len, reverse=True)
+                    headers = "\n".join(table_tsv(table, 0) for table in largest[:3])
+                    raise ExtractionError(
+                        f"{e}. Headers of the largest tables:\n{headers}\n"
+                        "Call again with column_mapping for the offerings table."
+                    ) from e
+                mapping = map_header(rows[0])
+            courses = parse_offerings_table(rows, mapping)
+        except ExtractionError as e:
+            return ActionResult(error=str(e))
+
+        collector.add(fingerprint_rows(rows), courses)
+        total = sum(len(courses) for courses in collector.pages.values())
+        mapped = ", ".join(f"{rows[0][index]!r} -> {field}" for index, field in sorted(mapping.items()))
+        missing = [field for field in Course.model_fields if field not in mapping.values()]
+        message = (
+            f"Stored {len(courses)} courses from this page ({total} so far).\n"
+            f"Column mapping: {mapped}\n"
+            + (f"Unmapped fields: {', '.join(missing)}\n" if missing else "")
+            + f"Header and sample rows:\n{table_tsv(rows, SAMPLE_ROWS)}"
+        )
+        logger.info(f"Table action read {len(courses)} courses ({total} so far)")
+        return ActionResult(extracted_content=message, include_in_memory=True)
+
+    return read_offerings_table
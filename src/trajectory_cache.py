@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urlparse
+import hashlib
+import logging
+import os
+
+from browser_use.agent.views import AgentHistory, AgentHistoryList
+
+from src.session_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRAJECTORY_DIR = os.path.join(DEFAULT_CACHE_DIR, "trajectories")
+
+# Actions that only move through the portal; the first step that does
+# anything else (extract_content, scroll, done...) ends the navigation
+NAVIGATION_ACTIONS = frozenset(
+    {
+        "go_to_url",
+        "click_element",
+        "input_text",
+        "select_dropdown_option",
+        "send_keys",
+        "wait",
+    }
+)
+
+
+def _action_names(item: AgentHistory) -> List[str]:
+    if not item.model_output:
+        return []
+    return [
+        name
+        for action in item.model_output.action
+        for name in action.model_dump(exclude_unset=True)
+    ]
+
+
+def navigation_prefix(history: AgentHistoryList) -> List[AgentHistory]:
+    """The leading steps of a run that only navigated, without errors"""
+    prefix = []
+    for item in history.history:
+        names = _action_names(item)
+        if not names or not NAVIGATION_ACTIONS.issuperset(names):
+            break
+        if any(result.error for result in item.result):
+            break
+        prefix.append(item)
+    return prefix
+
+
+@dataclass
+class Trajectory:
+    """Recorded navigation steps and the page they ended on"""
+
+    history: AgentHistoryList
+    landing_url: str = ""
+
+
+def _same_page(url: str, other: str) -> bool:
+    return bool(url) and urlparse(url).path == urlparse(other).path
+
+
+class TrajectoryCache:
+    """Recorded navigation steps of successful agent runs, keyed by task.
+
+    The key is a hash of the navigation part of the task text, so any
+    change to the prompt, portal URL or division records a new trajectory.
+    Typed-in credentials are stored as browser-use's sensitive data
+    placeholders, never as the values themselves.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_TRAJECTORY_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, task: str, suffix: str = ".json") -> str:
+        digest = hashlib.sha256(task.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}{suffix}")
+
+    def load(self, task: str, output_model) -> Optional[Trajectory]:
+        """Recorded steps for task, parsed with the agent's AgentOutput model"""
+        path = self._path(task)
+        if not os.path.exists(path):
+            return None
+        try:
+            history = AgentHistoryList.load_from_file(path, output_model)
+            landing_path = self._path(task, ".landing")
+            landing_url = ""
+            if os.path.exists(landing_path):
+                with open(landing_path, encoding="utf-8") as f:
+                    landing_url = f.read().strip()
+        except Exception as e:
+            logger.warning(f"Discarding unreadable trajectory {path}: {e}")
+            self.invalidate(task)
+            return None
+        return Trajectory(history, landing_url)
+
+    def record(self, task: str, history: AgentHistoryList) -> int:
+        """Store the navigation prefix of a successful run; returns its length"""
+        prefix = navigation_prefix(history)
+        if not prefix:
+            return 0
+        AgentHistoryList(history=prefix).save_to_file(self._path(task))
+        # The first step after the prefix saw the page navigation ended on
+        if len(history.history) > len(prefix) and history.history[len(prefix)].state:
+            with open(self._path(task, ".landing"), "w", encoding="utf-8") as f:
+                f.write(history.history[len(prefix)].state.url or "")
+        logger.info(f"Recorded {len(prefix)} navigation steps for replay")
+        return len(prefix)
+
+    def invalidate(self, task: str):
+        for suffix in (".json", ".landing"):
+            try:
+                os.remove(self._path(task, suffix))
+            except FileNotFoundError:
+                pass
+
+
+async def replay_trajectory(agent, trajectory: Trajectory, login_url: str) -> bool:
+    """Replay recorded steps through the agent without asking its LLM.
+
+    browser-use re-locates every recorded element in the live page and fails
+    the step when it is gone. Login steps are skipped when a cached session
+    means the login form never shows up. Returns False as soon as a step
+    fails or the replay does not land on the page the recorded run reached.
+    """
+    steps = trajectory.history.history
+    for number, item in enumerate(steps, start=1):
+        page = await agent.browser_context.get_current_page()
+        on_login = item.state and _same_page(item.state.url, login_url)
+        if on_login and not _same_page(page.url, login_url):
+            continue
+        try:
+            results = await agent.rerun_history(
+                AgentHistoryList(history=[item]), max_retries=1, delay_between_actions=0.5
+            )
+        except Exception as e:
+            logger.info(f"Replay failed at step {number}/{len(steps)}: {e}")
+            return False
+        errors = [result.error for result in results if result.error]
+        if errors:
+            logger.info(f"Replay failed at step {number}/{len(steps)}: {errors[0]}")
+            return False
+
+    page = await agent.browser_context.get_current_page()
+    if trajectory.landing_url and not _same_page(page.url, trajectory.landing_url):
+        logger.info(f"Replay ended on {page.url} instead of {trajectory.landing_url}")
+        return False
+    logger.info(f"Replayed {len(steps)} navigation steps without the LLM")
+    return True
@@ -5,9 +5,11 @@ from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import SecretStr
 
-from browser_use import Agent, BrowserConfig
+from browser_use import Agent
 from browser_use.browser.browser import Browser
-from browser_use.browser.context import BrowserContextConfig
+from browser_use.browser.context import BrowserContext
+
+from src.browser_profile import apply_profile, browser_config, context_config, get_profile
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
@@ -16,21 +18,21 @@ if not api_key:
 
 llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", api_key=SecretStr(api_key))
 
-browser = Browser(
-    config=BrowserConfig(
-        new_context_config=BrowserContextConfig(
-            viewport_expansion=0,
-        )
-    )
-)
+# BROWSER_PROFILE=lean skips images, fonts, stylesheets and third-party requests
+profile = get_profile(os.getenv("BROWSER_PROFILE", "default"))
+browser = Browser(config=browser_config(profile))
 
 
 async def run_search():
+    context = BrowserContext(browser=browser, config=context_config(profile))
+    await apply_profile(context, profile)
     agent = Agent(
         task="Go to amazon.com, search for laptop, sort by best rating, and give me the price of the first result",
         llm=llm,
         max_actions_per_step=4,
         browser=browser,
+        browser_context=context,
+        use_vision=profile.use_vision,
     )
 
     await agent.run(max_steps=25)
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from src.ranking import SchedulePreferences, ScheduleRanker
+from src.sections import Section
+from src.solver import ScheduleSolver
+
+DAYS = (0b00001, 0b00010, 0b00100, 0b01000, 0b00101, 0b01010)
+
+
+def random_sections(rng: random.Random):
+    sections = []
+    for course in range(rng.randint(2, 4)):
+        for number in range(rng.randint(1, 4)):
+            start = rng.randrange(8 * 60, 16 * 60, 15)
+            sections.append(
+                Section(
+                    course_code=f"C{course}",
+                    course_name=f"Course {course}",
+                    instructor=rng.choice(["Smith", "Jones", "Lee"]),
+                    room=f"R{number}",
+                    credits=3,
+                    days=rng.choice(DAYS),
+                    start=start,
+                    end=start + rng.choice((50, 75)),
+                    max_enrollment=30,
+                    total_enrollment=0,
+                )
+            )
+    return sections
+
+
+def exhaustive_cost(ranker: ScheduleRanker, schedule) -> float:
+    prefs = ranker.preferences
+    days = 0
+    static = 0.0
+    for section in schedule.sections:
+        days |= section.days
+        if 0 <= section.start < prefs.early_start:
+            static += bin(section.days).count("1") * prefs.early_weight
+        if prefs.preferred_instructors and not prefs.is_preferred(section):
+            static += prefs.instructor_weight
+    gap = ranker._gap_minutes(ranker._holes(schedule.occupancy, days))
+    return static + days.bit_count() * prefs.day_weight + gap * prefs.gap_weight
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_top_matches_exhaustive_search(seed):
+    rng = random.Random(seed)
+    solver = ScheduleSolver(random_sections(rng))
+    ranker = ScheduleRanker(
+        solver,
+        SchedulePreferences(
+            gap_weight=rng.choice((0.05, 0.5, 2.0)),
+            passing_minutes=rng.choice((0, 10, 15, 30)),
+            preferred_instructors=rng.choice(((), ("Smith",))),
+        ),
+    )
+    codes = solver.course_codes
+    costs = sorted(exhaustive_cost(ranker, s) for s in solver.iter_schedules(codes))
+    ranked = ranker.top(codes, k=3)
+
+    assert len(ranked) == min(3, len(costs))
+    for schedule, expected in zip(ranked, costs):
+        assert schedule.cost == pytest.approx(expected)
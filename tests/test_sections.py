@@ -0,0 +1,24 @@
+import pytest
+
+from src.sections import DAY_LETTERS, format_days, letters_mask, parse_days
+
+
+@pytest.mark.parametrize(
+    "picked, expected",
+    [
+        (["S", "U"], "SU"),
+        (["T", "U"], "TU"),
+        (["M", "T", "U"], "MTU"),
+        (["T", "R"], "TR"),
+        (list(DAY_LETTERS), DAY_LETTERS),
+        ([], ""),
+    ],
+)
+def test_letters_mask_keeps_every_pick(picked, expected):
+    assert format_days(letters_mask(picked)) == expected
+
+
+def test_joined_letters_are_ambiguous_to_parse_days():
+    # Why the multiselect cannot go through parse_days
+    assert format_days(parse_days("SU")) == "U"
+    assert format_days(parse_days("MTU")) == "MT"